@@ -4,8 +4,15 @@ Lambda function triggered by S3 events to extract raw text from uploaded PDFs.
 This handler listens for ``ObjectCreated`` events on the configured PDF
 uploads bucket (see ``template.yaml`` for event source configuration).
 When triggered, it downloads the new object from S3, extracts text using
-``PyPDF2``, and writes the extracted plain text back to S3 under a
-``extracted/`` prefix or stores it to DynamoDB (left as an exercise).
+``pypdfium2`` (bindings for the native PDFium library), and writes the
+extracted plain text back to S3 under a ``extracted/`` prefix or stores it
+to DynamoDB (left as an exercise).
+
+Small PDFs (up to Lambda's 6 MB synchronous payload limit) can skip the S3
+round trip entirely: invoke the function directly with a base64-encoded
+``pdfBytes`` field, or POST ``{"fileContent": "<base64>"}`` to the
+``/extract`` API route.  The extracted text is then returned as
+``{"text": ...}`` in the response body.
 
 Environment variables used:
 
@@ -15,17 +22,151 @@ Environment variables used:
   function response instead of being persisted.
 """
 
-import json
+import base64
+import io
+import multiprocessing
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
+from urllib.parse import unquote_plus
 
 import boto3
-from PyPDF2 import PdfReader
-import io
+import orjson
+import pypdfium2 as pdfium
+from boto3.s3.transfer import TransferConfig
+
+# Created once per container and reused across warm invocations
+_S3 = boto3.client("s3")
+
+# Large PDFs are fetched as concurrent ranged GETs so that the download is
+# not limited to a single S3 stream.
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+# Documents shorter than this many pages per worker are extracted in-process;
+# below that the cost of forking outweighs the parallel speed-up.
+_MIN_PAGES_PER_WORKER = 8
+# Lambda allocates one full vCPU per 1769 MB of memory, whatever
+# ``os.cpu_count()`` reports, and every worker parses the whole document
+_MB_PER_VCPU = 1769
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _page_texts(pdf: Any, start: int, stop: int) -> List[str]:
+    """Return the text of pages ``start`` to ``stop - 1`` of an open document.
+
+    Text pages are closed explicitly so that PDFium's native buffers are
+    released as soon as each page has been read.
+    """
+    texts = []
+    for index in range(start, stop):
+        page = pdf[index]
+        textpage = page.get_textpage()
+        texts.append(textpage.get_text_range())
+        textpage.close()
+        page.close()
+    return texts
+
+
+def _extract_range(pdf_bytes: Any, start: int, stop: int, conn: Any) -> None:
+    """Worker process entry point: send the text of a page range to ``conn``."""
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        conn.send(_page_texts(pdf, start, stop))
+    finally:
+        pdf.close()
+        conn.close()
+
+
+def _vcpus() -> int:
+    """Return the number of full vCPUs available to the function."""
+    memory_mb = os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    if memory_mb is None:
+        return os.cpu_count() or 1
+    return max(1, min(os.cpu_count() or 1, int(memory_mb) // _MB_PER_VCPU))
+
+
+def _extract_text(pdf_bytes: Any) -> str:
+    """Return the plain text of every page in ``pdf_bytes``.
+
+    ``pdf_bytes`` may be raw bytes or a seekable binary buffer.  PDFium is
+    not thread-safe, so long documents are split into contiguous page ranges
+    that are extracted by forked worker processes, one per available vCPU.
+    ``multiprocessing.Pool`` is avoided because Lambda does not provide
+    ``/dev/shm``; plain processes with pipes work there.  If a worker dies
+    without sending its pages the document is extracted in-process instead,
+    which either succeeds or raises the underlying PDFium error.
+    """
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        page_count = len(pdf)
+        workers = min(_vcpus(), page_count // _MIN_PAGES_PER_WORKER)
+        if workers < 2:
+            return "\n".join(_page_texts(pdf, 0, page_count))
+    finally:
+        pdf.close()
+
+    ctx = multiprocessing.get_context("fork")
+    step = -(-page_count // workers)
+    jobs = []
+    for start in range(0, page_count, step):
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        proc = ctx.Process(
+            target=_extract_range,
+            args=(pdf_bytes, start, min(start + step, page_count), child_conn),
+        )
+        proc.start()
+        child_conn.close()
+        jobs.append((proc, parent_conn))
+
+    texts: List[str] = []
+    failed = False
+    try:
+        # Drain every pipe before joining so large results cannot block
+        for proc, conn in jobs:
+            try:
+                texts.extend(conn.recv())
+            except EOFError:
+                # The worker exited (crashed or was killed) before sending
+                failed = True
+    finally:
+        for proc, conn in jobs:
+            conn.close()
+            proc.join()
+    if failed or any(proc.exitcode != 0 for proc, _ in jobs):
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            return "\n".join(_page_texts(pdf, 0, page_count))
+        finally:
+            pdf.close()
+    return "\n".join(texts)
+
+
+def _inline_pdf(event: Dict[str, Any]) -> bytes:
+    """Return the PDF sent inline with a direct or API Gateway invocation."""
+    if event.get("pdfBytes"):
+        return base64.b64decode(event["pdfBytes"])
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return base64.b64decode(orjson.loads(body)["fileContent"])
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    s3 = boto3.client("s3")
+    # Small PDFs delivered inline bypass S3 altogether
+    if "Records" not in event:
+        try:
+            text = _extract_text(_inline_pdf(event))
+        except (KeyError, TypeError, ValueError, pdfium.PdfiumError) as exc:
+            return {"statusCode": 400, "body": _dumps({"error": f"Invalid PDF payload: {exc}"})}
+        return {"statusCode": 200, "body": _dumps({"text": text})}
+
     uploads_bucket = os.environ.get("UPLOADS_BUCKET_NAME")
     dest_bucket = os.environ.get("EXTRACTED_BUCKET_NAME")
 
@@ -37,25 +178,27 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         key = s3_info.get("object", {}).get("key")
         if not bucket_name or not key:
             continue
+        # Keys in S3 event notifications are URL-encoded (spaces become "+")
+        key = unquote_plus(key)
 
         # Only process the expected uploads bucket
         if uploads_bucket and bucket_name != uploads_bucket:
             continue
 
-        # Download the PDF from S3
-        obj = s3.get_object(Bucket=bucket_name, Key=key)
-        pdf_bytes = obj["Body"].read()
+        # Download the PDF from S3 (multipart for large objects)
+        pdf_buffer = io.BytesIO()
+        _S3.download_fileobj(bucket_name, key, pdf_buffer, Config=_TRANSFER_CONFIG)
+        pdf_buffer.seek(0)
 
-        # Extract text using PyPDF2
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        # Extract text using PDFium
+        text = _extract_text(pdf_buffer)
 
         if dest_bucket:
             # Save extracted text to dest bucket under extracted/key.txt
             dest_key = f"extracted/{os.path.splitext(key)[0]}.txt"
-            s3.put_object(Bucket=dest_bucket, Key=dest_key, Body=text.encode("utf-8"), ContentType="text/plain")
+            _S3.put_object(Bucket=dest_bucket, Key=dest_key, Body=text.encode("utf-8"), ContentType="text/plain")
             outputs.append({"source": key, "destination": dest_key})
         else:
             outputs.append({"source": key, "text": text})
 
-    return {"statusCode": 200, "body": json.dumps(outputs)}
\ No newline at end of file
+    return {"statusCode": 200, "body": _dumps(outputs)}
\ No newline at end of file
@@ -3,27 +3,266 @@ Lambda to generate flashcards (question‑answer pairs) from a summary.  This
 function calls an LLM to produce a list of flashcards, each containing a
 question and its answer.  The event body should contain a ``summary``
 field.  If OpenAI is not configured, a dummy flashcard is returned.
+
+OpenAI requests are counted against the budget shared through
+``RATE_LIMIT_TABLE`` (when set); a 429 is returned while it is exhausted.
 """
 
-import json
+import base64
 import os
-from typing import Any, Dict, List
+import time
+import uuid
+from typing import Any, Dict, List, Sequence, Tuple
+
+import boto3
+import json5
+import orjson
+from botocore.exceptions import BotoCoreError, ClientError
+from tenacity import RetryCallState, Retrying, retry_if_exception_type, wait_exponential_jitter
 
 try:
     import openai  # type: ignore
 except ImportError:
     openai = None
 
+if openai:
+    # Retries are handled by tenacity in ``_call_openai``
+    openai.max_retries = 0
+    _RETRYABLE_ERRORS: Tuple[type, ...] = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+else:
+    _RETRYABLE_ERRORS = ()
+
+# Created once per container and reused across warm invocations
+_DDB = boto3.client("dynamodb")
+
+# An OpenAI call, retries included, has to finish within API Gateway's 29 s
+# integration timeout.  Every attempt's request timeout is the time left in
+# this budget, and a retry is only started while ``_MIN_ATTEMPT_SECONDS``
+# remain for it.
+_CALL_BUDGET_SECONDS = 25
+_MIN_ATTEMPT_SECONDS = 5
+_MAX_ATTEMPTS = 5
+_MAX_BACKOFF_SECONDS = 5
+_BACKOFF = wait_exponential_jitter(initial=1, max=_MAX_BACKOFF_SECONDS)
+
+# Completion budget for the cards of one summary
+_MAX_TOKENS_PER_SUMMARY = 500
+# Per-summary budget inside a batch
+_BATCH_MAX_TOKENS_PER_SUMMARY = 300
+# A full batched reply (1200 tokens) takes roughly 15-20 s at gpt-3.5 output
+# rates, which has to fit in API Gateway's 29 s integration timeout
+_MAX_BATCH_SIZE = 4
+
+# Item of the shared OpenAI request budget in the ``RATE_LIMIT_TABLE`` table
+_RATE_LIMIT_KEY = {"id": {"S": "openai"}}
+
+# Placeholder cards used when OpenAI isn't configured.  They are only read
+# (``_to_flashcards`` builds new dicts with ids), so one shared copy is used.
+_DUMMY_FLASHCARDS: Tuple[Dict[str, str], ...] = (
+    {
+        "question": "What is the purpose of flashcards?",
+        "answer": "Flashcards are used as a study aid to improve memory through spaced repetition.",
+    },
+)
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON body of an API Gateway proxy event.
+
+    ``orjson`` parses bytes directly, so a base64-encoded body is decoded
+    straight into the parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
+
+
+def _loads_llm_json(content: str) -> Any:
+    """Parse JSON returned by the LLM.
+
+    The strict ``orjson`` parser handles the common case; the much slower
+    ``json5`` parser is only tried when the model emitted slightly malformed
+    JSON (trailing commas, single quotes and so on).
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return json5.loads(content)
 
-def _dummy_flashcards(summary: str) -> List[Dict[str, str]]:
+
+def _wait_retry_after(retry_state: RetryCallState) -> float:
+    """Honour the server's ``Retry-After`` header, else back off with jitter."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), _MAX_BACKOFF_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    return _BACKOFF(retry_state)
+
+
+def _acquire_openai_token() -> bool:
+    """Take one request from the OpenAI budget shared by all functions.
+
+    The budget is a token bucket held in a single DynamoDB item that the
+    RateLimitRefill function resets every minute; the conditional decrement
+    fails once it is empty.  Until the first refill has run (right after a
+    deploy) the missing bucket is treated as full.  The limiter is disabled when
+    ``RATE_LIMIT_TABLE`` isn't set, and fails open if DynamoDB itself errors
+    so that a limiter outage doesn't take the function down with it.
+    """
+    table_name = os.environ.get("RATE_LIMIT_TABLE")
+    if not table_name:
+        return True
+    try:
+        _DDB.update_item(
+            TableName=table_name,
+            Key=_RATE_LIMIT_KEY,
+            UpdateExpression="SET tokens = if_not_exists(tokens, :full) - :one",
+            ConditionExpression="attribute_not_exists(tokens) OR tokens > :zero",
+            ExpressionAttributeValues={
+                ":full": {"N": os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "60")},
+                ":one": {"N": "1"},
+                ":zero": {"N": "0"},
+            },
+        )
+    except _DDB.exceptions.ConditionalCheckFailedException:
+        return False
+    except (ClientError, BotoCoreError):
+        pass
+    return True
+
+
+class _BudgetExhausted(Exception):
+    """Raised by ``_call_openai`` when the shared OpenAI budget is spent."""
+
+
+def _rate_limited() -> Dict[str, Any]:
+    """Build the 429 response sent while the shared OpenAI budget is spent."""
+    # The bucket is refilled about once a minute
+    retry_after = 60 - int(time.time()) % 60
+    return {
+        "statusCode": 429,
+        "headers": {"Retry-After": str(retry_after)},
+        "body": _dumps({"error": "Too many requests, try again later"}),
+    }
+
+
+def _call_openai(prompt: str, max_tokens: int) -> str:
+    """Send ``prompt`` to the chat completion API and return the reply text.
+
+    Rate limits, connection failures (including timeouts) and server errors
+    are retried with exponential backoff until ``_CALL_BUDGET_SECONDS`` is
+    spent; the last error is re-raised once retries run out so that callers
+    only fall back to dummy content at that point.  Every attempt, retries
+    included, takes a token from the shared budget first and
+    ``_BudgetExhausted`` is raised once none are left.
+    """
+    deadline = time.monotonic() + _CALL_BUDGET_SECONDS
+
+    def out_of_time(retry_state: RetryCallState) -> bool:
+        return (
+            retry_state.attempt_number >= _MAX_ATTEMPTS
+            or deadline - time.monotonic() < _MIN_ATTEMPT_SECONDS
+        )
+
+    def wait(retry_state: RetryCallState) -> float:
+        return min(_wait_retry_after(retry_state), max(deadline - time.monotonic() - _MIN_ATTEMPT_SECONDS, 0))
+
+    retrying = Retrying(
+        stop=out_of_time,
+        wait=wait,
+        retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+        reraise=True,
+    )
+    for attempt in retrying:
+        with attempt:
+            if not _acquire_openai_token():
+                raise _BudgetExhausted()
+            response = openai.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "system", "content": prompt}],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                timeout=deadline - time.monotonic(),
+            )
+    return response.choices[0].message.content.strip()
+
+
+def _batch_cards(summaries: List[str]) -> List[Sequence[Dict[str, str]]]:
+    """Generate raw flashcards for each summary using a single OpenAI request.
+
+    The summaries are numbered in one prompt and the model is asked for a
+    JSON object mapping each number to its cards.  Any summary missing from
+    the reply falls back to the dummy flashcards.
+    """
+    numbered = "\n\n".join(f"Summary {index}:\n{summary}" for index, summary in enumerate(summaries))
+    prompt = (
+        "Generate three flashcards from each of the following numbered summaries. "
+        "Return the result as a JSON object mapping each summary number (as a string) to a list where each "
+        "element has 'front' and 'back' fields, representing the question and answer.\n\n"
+        + numbered
+    )
+    try:
+        result = _loads_llm_json(_call_openai(prompt, _BATCH_MAX_TOKENS_PER_SUMMARY * len(summaries)))
+    except _BudgetExhausted:
+        raise
+    except Exception:
+        result = {}
+    if isinstance(result, list):
+        result = {str(index): cards for index, cards in enumerate(result)}
+    elif not isinstance(result, dict):
+        result = {}
+
+    return [
+        _valid_cards(result.get(str(index))) or _dummy_flashcards(summary)
+        for index, summary in enumerate(summaries)
+    ]
+
+
+def _valid_cards(cards: Any) -> List[Dict[str, str]]:
+    """Return the card objects in ``cards`` as parsed from the LLM reply.
+
+    Anything other than a list of objects (strings, nested lists and so
+    on) is dropped so that ``_to_flashcards`` only sees dictionaries.
+    """
+    if not isinstance(cards, list):
+        return []
+    return [card for card in cards if isinstance(card, dict)]
+
+
+def _to_flashcards(cards: Sequence[Dict[str, str]], topic_id: str) -> List[Dict[str, str]]:
+    """Convert raw cards to full Flashcard objects: add id and topicId, rename keys.
+
+    Ids are random (version 4) UUIDs in their usual dashed form; the randomness for all
+    cards is read with a single ``os.urandom`` call.
+    """
+    raw = os.urandom(16 * len(cards))
     return [
         {
-            "question": "What is the purpose of flashcards?",
-            "answer": "Flashcards are used as a study aid to improve memory through spaced repetition.",
+            "id": str(uuid.UUID(bytes=raw[index * 16:(index + 1) * 16], version=4)),
+            # card may have 'question'/'answer' (dummy) or 'front'/'back'
+            "front": card.get("front") or card.get("question") or "",
+            "back": card.get("back") or card.get("answer") or "",
+            "topicId": topic_id,
         }
+        for index, card in enumerate(cards)
     ]
 
 
+def _dummy_flashcards(summary: str) -> Sequence[Dict[str, str]]:
+    return _DUMMY_FLASHCARDS
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Generate flashcards from a summary of study material.
 
@@ -31,58 +270,64 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     ``topicId``.  Returns a list of objects matching the ``Flashcard``
     interface used by the front‑end (id, front, back, topicId).  When the
     OpenAI API is unavailable a default set of flashcards is used.
+
+    Alternatively a ``summaries`` list may be sent to generate cards for
+    several summaries with one OpenAI request.  The response then contains
+    a ``results`` list with one ``{"flashcards": [...]}`` object per
+    summary, in the same order.
     """
-    # Decode body
-    body = event.get("body") or "{}"
-    if event.get("isBase64Encoded"):
-        import base64
-        body = base64.b64decode(body).decode()
     try:
-        payload = json.loads(body)
-        summary: str = payload["summary"]
+        payload = _parse_body(event)
+        summaries = payload.get("summaries")
+        summary: str = payload["summary"] if summaries is None else ""
         topic_id: str = payload.get("topicId", "general")
-    except (KeyError, json.JSONDecodeError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
+    except (KeyError, orjson.JSONDecodeError) as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
 
     api_key = os.environ.get("OPENAI_API_KEY")
-    cards: List[Dict[str, str]]
     if openai and api_key:
         openai.api_key = api_key
+
+    if summaries is not None:
+        if (
+            not isinstance(summaries, list)
+            or not 0 < len(summaries) <= _MAX_BATCH_SIZE
+            or not all(isinstance(item, str) for item in summaries)
+        ):
+            return {
+                "statusCode": 400,
+                "body": _dumps({"error": f"'summaries' must be a list of 1 to {_MAX_BATCH_SIZE} strings"}),
+            }
+        if openai and api_key:
+            try:
+                batches = _batch_cards(summaries)
+            except _BudgetExhausted:
+                return _rate_limited()
+        else:
+            batches = [_dummy_flashcards(item) for item in summaries]
+        return {
+            "statusCode": 200,
+            "body": _dumps({"results": [{"flashcards": _to_flashcards(cards, topic_id)} for cards in batches]}),
+        }
+
+    cards: Sequence[Dict[str, str]]
+    if openai and api_key:
         prompt = (
             "Generate three flashcards from the following summary. "
             "Return the result as JSON: a list where each element has 'front' and 'back' fields, representing the question and answer.\n\nSummary:\n"
             + summary
         )
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.7,
-                max_tokens=500,
-            )
-            content = response["choices"][0]["message"]["content"].strip()
-            cards = json.loads(content)
+            content = _call_openai(prompt, _MAX_TOKENS_PER_SUMMARY)
+            cards = _valid_cards(_loads_llm_json(content)) or _dummy_flashcards(summary)
+        except _BudgetExhausted:
+            return _rate_limited()
         except Exception:
             cards = _dummy_flashcards(summary)
     else:
         cards = _dummy_flashcards(summary)
 
-    # Convert to full Flashcard objects: add id and topicId, rename keys
-    import uuid
-
-    flashcards: List[Dict[str, str]] = []
-    for card in cards:
-        # card may have 'question'/'answer' (dummy) or 'front'/'back'
-        front = card.get("front") or card.get("question") or ""
-        back = card.get("back") or card.get("answer") or ""
-        flashcards.append({
-            "id": str(uuid.uuid4()),
-            "front": front,
-            "back": back,
-            "topicId": topic_id,
-        })
-
     return {
         "statusCode": 200,
-        "body": json.dumps({"flashcards": flashcards}),
+        "body": _dumps({"flashcards": _to_flashcards(cards, topic_id)}),
     }
\ No newline at end of file
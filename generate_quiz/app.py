@@ -9,27 +9,242 @@ If the ``OPENAI_API_KEY`` environment variable is not configured or the
 fallback.  The returned structure is a list of dictionaries with keys
 ``question``, ``options`` (a list of four strings), and ``answer`` (the
 correct option text).
+
+If ``RATE_LIMIT_TABLE`` is set, every OpenAI request first takes a token
+from the request budget shared with the other OpenAI-backed functions, and
+the function answers 429 with a ``Retry-After`` header while it is spent.
 """
 
-import json
+import base64
 import os
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import boto3
+import json5
+import orjson
+from botocore.exceptions import BotoCoreError, ClientError
+from tenacity import RetryCallState, Retrying, retry_if_exception_type, wait_exponential_jitter
 
 try:
     import openai  # type: ignore
 except ImportError:
     openai = None
 
+if openai:
+    # Retries are handled by tenacity in ``_call_openai``
+    openai.max_retries = 0
+    _RETRYABLE_ERRORS: Tuple[type, ...] = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+else:
+    _RETRYABLE_ERRORS = ()
+
+# Created once per container and reused across warm invocations
+_DDB = boto3.client("dynamodb")
+
+# An OpenAI call, retries included, has to finish within API Gateway's 29 s
+# integration timeout.  Every attempt's request timeout is the time left in
+# this budget, and a retry is only started while ``_MIN_ATTEMPT_SECONDS``
+# remain for it.
+_CALL_BUDGET_SECONDS = 25
+_MIN_ATTEMPT_SECONDS = 5
+_MAX_ATTEMPTS = 5
+_MAX_BACKOFF_SECONDS = 5
+_BACKOFF = wait_exponential_jitter(initial=1, max=_MAX_BACKOFF_SECONDS)
+
+# Completion budget for one quiz of five questions
+_MAX_TOKENS_PER_QUIZ = 800
+# Per-quiz budget inside a batch
+_BATCH_MAX_TOKENS_PER_QUIZ = 600
+# A full batched reply (1200 tokens) takes roughly 15-20 s at gpt-3.5 output
+# rates, which has to fit in API Gateway's 29 s integration timeout
+_MAX_BATCH_SIZE = 2
+
+# Item of the shared OpenAI request budget in the ``RATE_LIMIT_TABLE`` table
+_RATE_LIMIT_KEY = {"id": {"S": "openai"}}
+
+# Placeholder quiz used when OpenAI isn't configured.  It is shared between
+# invocations and never mutated; the single-quiz response body is
+# serialised once up front.
+_DUMMY_QUIZ: Tuple[Dict[str, Any], ...] = (
+    {
+        "question": "This is a placeholder question because the quiz generator is not configured.",
+        "options": ["Option A", "Option B", "Option C", "Option D"],
+        "answer": "Option A",
+    },
+)
+_DUMMY_QUIZ_BODY = orjson.dumps({"questions": _DUMMY_QUIZ}).decode()
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON body of an API Gateway proxy event.
+
+    ``orjson`` parses bytes directly, so a base64-encoded body is decoded
+    straight into the parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
+
+
+def _loads_llm_json(content: str) -> Any:
+    """Parse JSON returned by the LLM.
+
+    The strict ``orjson`` parser handles the common case; the much slower
+    ``json5`` parser is only tried when the model emitted slightly malformed
+    JSON (trailing commas, single quotes and so on).
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return json5.loads(content)
+
+
+def _wait_retry_after(retry_state: RetryCallState) -> float:
+    """Honour the server's ``Retry-After`` header, else back off with jitter."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), _MAX_BACKOFF_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    return _BACKOFF(retry_state)
+
+
+def _acquire_openai_token() -> bool:
+    """Take one request from the OpenAI budget shared by all functions.
+
+    The budget is a token bucket held in a single DynamoDB item that the
+    RateLimitRefill function resets every minute; the conditional decrement
+    fails once it is empty.  Until the first refill has run (right after a
+    deploy) the missing bucket is treated as full.  The limiter is disabled when
+    ``RATE_LIMIT_TABLE`` isn't set, and fails open if DynamoDB itself errors
+    so that a limiter outage doesn't take the function down with it.
+    """
+    table_name = os.environ.get("RATE_LIMIT_TABLE")
+    if not table_name:
+        return True
+    try:
+        _DDB.update_item(
+            TableName=table_name,
+            Key=_RATE_LIMIT_KEY,
+            UpdateExpression="SET tokens = if_not_exists(tokens, :full) - :one",
+            ConditionExpression="attribute_not_exists(tokens) OR tokens > :zero",
+            ExpressionAttributeValues={
+                ":full": {"N": os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "60")},
+                ":one": {"N": "1"},
+                ":zero": {"N": "0"},
+            },
+        )
+    except _DDB.exceptions.ConditionalCheckFailedException:
+        return False
+    except (ClientError, BotoCoreError):
+        pass
+    return True
+
+
+class _BudgetExhausted(Exception):
+    """Raised by ``_call_openai`` when the shared OpenAI budget is spent."""
+
+
+def _rate_limited() -> Dict[str, Any]:
+    """Build the 429 response sent while the shared OpenAI budget is spent."""
+    # The bucket is refilled about once a minute
+    retry_after = 60 - int(time.time()) % 60
+    return {
+        "statusCode": 429,
+        "headers": {"Retry-After": str(retry_after)},
+        "body": _dumps({"error": "Too many requests, try again later"}),
+    }
 
-def _dummy_quiz(summary: str) -> List[Dict[str, Any]]:
-    """Generate a placeholder quiz when OpenAI isn't configured."""
-    return [
-        {
-            "question": "This is a placeholder question because the quiz generator is not configured.",
-            "options": ["Option A", "Option B", "Option C", "Option D"],
-            "answer": "Option A",
-        }
-    ]
+
+def _call_openai(prompt: str, max_tokens: int) -> str:
+    """Send ``prompt`` to the chat completion API and return the reply text.
+
+    Rate limits, connection failures (including timeouts) and server errors
+    are retried with exponential backoff until ``_CALL_BUDGET_SECONDS`` is
+    spent; the last error is re-raised once retries run out so that callers
+    only fall back to dummy content at that point.  Every attempt, retries
+    included, takes a token from the shared budget first and
+    ``_BudgetExhausted`` is raised once none are left.
+    """
+    deadline = time.monotonic() + _CALL_BUDGET_SECONDS
+
+    def out_of_time(retry_state: RetryCallState) -> bool:
+        return (
+            retry_state.attempt_number >= _MAX_ATTEMPTS
+            or deadline - time.monotonic() < _MIN_ATTEMPT_SECONDS
+        )
+
+    def wait(retry_state: RetryCallState) -> float:
+        return min(_wait_retry_after(retry_state), max(deadline - time.monotonic() - _MIN_ATTEMPT_SECONDS, 0))
+
+    retrying = Retrying(
+        stop=out_of_time,
+        wait=wait,
+        retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+        reraise=True,
+    )
+    for attempt in retrying:
+        with attempt:
+            if not _acquire_openai_token():
+                raise _BudgetExhausted()
+            response = openai.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "system", "content": prompt}],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                timeout=deadline - time.monotonic(),
+            )
+    return response.choices[0].message.content.strip()
+
+
+def _batch_quizzes(summaries: List[str]) -> List[Sequence[Dict[str, Any]]]:
+    """Generate a quiz for each summary using a single OpenAI request.
+
+    The summaries are numbered in one prompt and the model is asked for a
+    JSON object mapping each number to its questions, which keeps request
+    rate pressure flat regardless of batch size.  Any summary missing from
+    the reply falls back to the dummy quiz.
+    """
+    numbered = "\n\n".join(f"Summary {index}:\n{summary}" for index, summary in enumerate(summaries))
+    prompt = (
+        "You are a helpful assistant that creates multiple choice quizzes. "
+        "For each of the following numbered summaries of study material, generate five distinct MCQ questions. "
+        "Each question should include four options and specify the correct answer. "
+        "Return the result as a JSON object mapping each summary number (as a string) to a list where each "
+        "element has 'question', 'options' (list of four strings), and 'answer' (one of the options).\n\n"
+        + numbered
+    )
+    try:
+        result = _loads_llm_json(_call_openai(prompt, _BATCH_MAX_TOKENS_PER_QUIZ * len(summaries)))
+    except _BudgetExhausted:
+        raise
+    except Exception:
+        result = {}
+    if isinstance(result, list):
+        result = {str(index): quiz for index, quiz in enumerate(result)}
+    elif not isinstance(result, dict):
+        result = {}
+
+    quizzes = []
+    for index, summary in enumerate(summaries):
+        quiz = result.get(str(index))
+        quizzes.append(quiz if isinstance(quiz, list) else _dummy_quiz(summary))
+    return quizzes
+
+
+def _dummy_quiz(summary: str) -> Sequence[Dict[str, Any]]:
+    """Return the placeholder quiz used when OpenAI isn't configured."""
+    return _DUMMY_QUIZ
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -41,47 +256,77 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     interface expected by the Next.js front‑end (see ``src/types`` in
     examfleet‑fe).  On failure to call the OpenAI API a single dummy
     question is returned.
+
+    Alternatively a ``summaries`` list may be sent to generate several
+    quizzes with one OpenAI request.  The response then contains a
+    ``results`` list with one ``{"questions": [...]}`` object per summary,
+    in the same order.
     """
-    # Decode body
-    body = event.get("body") or "{}"
-    if event.get("isBase64Encoded"):
-        import base64
-        body = base64.b64decode(body).decode()
     try:
-        payload = json.loads(body)
-        summary = payload["summary"]
-    except (KeyError, json.JSONDecodeError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
+        payload = _parse_body(event)
+        summaries = payload.get("summaries")
+        summary = payload["summary"] if summaries is None else None
+    except (KeyError, orjson.JSONDecodeError) as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
 
     api_key = os.environ.get("OPENAI_API_KEY")
-    quiz: List[Dict[str, Any]]
     if openai and api_key:
         openai.api_key = api_key
-        # Craft a prompt instructing the LLM to return valid JSON with
-        # the desired structure.  We ask for 5 questions by default.
-        prompt = (
-            "You are a helpful assistant that creates multiple choice quizzes. "
-            "Given the following summary of study material, generate five distinct MCQ questions. "
-            "Each question should include four options and specify the correct answer. "
-            "Return the result as JSON: a list where each element has 'question', 'options' (list of four strings), "
-            "and 'answer' (one of the options).\n\nSummary:\n" + summary
-        )
+
+    if summaries is not None:
+        if (
+            not isinstance(summaries, list)
+            or not 0 < len(summaries) <= _MAX_BATCH_SIZE
+            or not all(isinstance(item, str) for item in summaries)
+        ):
+            return {
+                "statusCode": 400,
+                "body": _dumps({"error": f"'summaries' must be a list of 1 to {_MAX_BATCH_SIZE} strings"}),
+            }
+        if openai and api_key:
+            try:
+                quizzes = _batch_quizzes(summaries)
+            except _BudgetExhausted:
+                return _rate_limited()
+        else:
+            quizzes = [_dummy_quiz(item) for item in summaries]
+        return {
+            "statusCode": 200,
+            "body": _dumps({"results": [{"questions": quiz} for quiz in quizzes]}),
+        }
+
+    if not (openai and api_key):
+        return {"statusCode": 200, "body": _DUMMY_QUIZ_BODY}
+
+    # Craft a prompt instructing the LLM to return valid JSON with
+    # the desired structure.  We ask for 5 questions by default.
+    prompt = (
+        "You are a helpful assistant that creates multiple choice quizzes. "
+        "Given the following summary of study material, generate five distinct MCQ questions. "
+        "Each question should include four options and specify the correct answer. "
+        "Return the result as JSON: a list where each element has 'question', 'options' (list of four strings), "
+        "and 'answer' (one of the options).\n\nSummary:\n" + summary
+    )
+    try:
+        content = _call_openai(prompt, _MAX_TOKENS_PER_QUIZ)
+    except _BudgetExhausted:
+        return _rate_limited()
+    except Exception:
+        return {"statusCode": 200, "body": _DUMMY_QUIZ_BODY}
+
+    # Normalise the key name for the front‑end: `questions` instead of `quiz`.
+    # Well-formed JSON from the model is spliced into the body as is rather
+    # than being decoded and serialised again; only the lenient fallback
+    # parse has to be re-encoded.
+    try:
+        orjson.loads(content)
+    except orjson.JSONDecodeError:
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.7,
-                max_tokens=800,
-            )
-            content = response["choices"][0]["message"]["content"].strip()
-            quiz = json.loads(content)
+            quiz: List[Dict[str, Any]] = json5.loads(content)
         except Exception:
-            quiz = _dummy_quiz(summary)
-    else:
-        quiz = _dummy_quiz(summary)
-
-    # Normalise the key name for the front‑end: `questions` instead of `quiz`
+            return {"statusCode": 200, "body": _DUMMY_QUIZ_BODY}
+        return {"statusCode": 200, "body": _dumps({"questions": quiz})}
     return {
         "statusCode": 200,
-        "body": json.dumps({"questions": quiz}),
+        "body": '{"questions":' + content + "}",
     }
\ No newline at end of file
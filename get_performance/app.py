@@ -4,6 +4,12 @@ queries a DynamoDB table of quiz results (same table used by the
 SubmitQuiz Lambda) and returns aggregate metrics such as the number of
 quizzes taken, total score, and average score.
 
+Aggregates are normally read from the per-user rollup item (sort key
+``__stats__``) maintained by SubmitQuiz.  Until a rollup has been seeded
+the user's results are summed with a consistent query and written over it;
+the write only succeeds if no submission touched the rollup in between
+(tracked by its ``version`` counter), otherwise it is retried next time.
+
 Expected input JSON:
 
 ```
@@ -18,40 +24,109 @@ Environment variables:
   submissions.
 """
 
-import json
+import base64
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import boto3
-from boto3.dynamodb.conditions import Key
+import orjson
+
+# Created once per container and reused across warm invocations.  The
+# low-level client is used rather than the resource API to avoid its
+# per-item type marshalling; AttributeValues are built and read directly.
+_DDB = boto3.client("dynamodb")
+
+# Sort key of the per-user rollup item maintained by SubmitQuiz
+_STATS_QUIZ_ID = "__stats__"
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON body of an API Gateway proxy event.
+
+    ``orjson`` parses bytes directly, so a base64-encoded body is decoded
+    straight into the parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
+
+
+def _aggregate_results(table_name: str, user_id: str) -> Tuple[int, int]:
+    """Return ``(total_quizzes, total_score)`` summed over a user's results.
+
+    Only the score attribute is fetched, and every page of the query is read
+    since each one is capped at 1 MB.
+    """
+    pages = _DDB.get_paginator("query").paginate(
+        TableName=table_name,
+        KeyConditionExpression="userId = :user",
+        ExpressionAttributeValues={":user": {"S": user_id}},
+        ProjectionExpression="quizId, #score",
+        ExpressionAttributeNames={"#score": "score"},
+        ConsistentRead=True,
+    )
+    total_quizzes = 0
+    total_score = 0
+    for page in pages:
+        for item in page.get("Items", []):
+            if item["quizId"]["S"] == _STATS_QUIZ_ID:
+                continue
+            total_quizzes += 1
+            total_score += int(item.get("score", {}).get("N", 0))
+    return total_quizzes, total_score
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
-        body = event.get("body") or "{}"
-        if event.get("isBase64Encoded"):
-            import base64
-            body = base64.b64decode(body).decode()
-        payload = json.loads(body)
+        payload = _parse_body(event)
         user_id = payload["userId"]
-    except (KeyError, json.JSONDecodeError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
+    except (KeyError, orjson.JSONDecodeError) as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
 
     table_name = os.environ.get("QUIZ_RESULTS_TABLE")
     if not table_name:
-        return {"statusCode": 500, "body": json.dumps({"error": "QUIZ_RESULTS_TABLE not configured"})}
-
-    dynamodb = boto3.resource("dynamodb")
-    table = dynamodb.Table(table_name)
-    # Query by partition key (userId)
-    response = table.query(KeyConditionExpression=Key("userId").eq(user_id))
-    items = response.get("Items", [])
-    total_quizzes = len(items)
-    total_score = sum(item.get("score", 0) for item in items)
+        return {"statusCode": 500, "body": _dumps({"error": "QUIZ_RESULTS_TABLE not configured"})}
+
+    stats_key = {"userId": {"S": user_id}, "quizId": {"S": _STATS_QUIZ_ID}}
+    stats = _DDB.get_item(TableName=table_name, Key=stats_key, ConsistentRead=True).get("Item")
+    if stats and "seeded" in stats:
+        total_quizzes = int(stats.get("totalQuizzes", {}).get("N", 0))
+        total_score = int(stats.get("totalScore", {}).get("N", 0))
+    else:
+        # SubmitQuiz may already have applied deltas to an unseeded rollup;
+        # the totals are replaced only if none landed since it was read.
+        version = stats.get("version", {}).get("N") if stats else None
+        total_quizzes, total_score = _aggregate_results(table_name, user_id)
+        values = {
+            ":quizzes": {"N": str(total_quizzes)},
+            ":score": {"N": str(total_score)},
+            ":seeded": {"BOOL": True},
+        }
+        if version is None:
+            condition = "attribute_not_exists(version)"
+        else:
+            condition = "version = :version"
+            values[":version"] = {"N": version}
+        try:
+            _DDB.update_item(
+                TableName=table_name,
+                Key=stats_key,
+                UpdateExpression="SET totalQuizzes = :quizzes, totalScore = :score, seeded = :seeded",
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+            )
+        except _DDB.exceptions.ConditionalCheckFailedException:
+            # A submission landed meanwhile; seed on a later request
+            pass
     avg_score = total_score / total_quizzes if total_quizzes else 0
     return {
         "statusCode": 200,
-        "body": json.dumps({
+        "body": _dumps({
             "userId": user_id,
             "totalQuizzes": total_quizzes,
             "totalScore": total_score,
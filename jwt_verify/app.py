@@ -12,15 +12,30 @@ Environment variables:
   JSON file packaged with the Lambda (if not using default credentials).
 """
 
-import json
+import hashlib
 import os
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Tuple
 
 import firebase_admin
+import orjson
 from firebase_admin import auth, credentials
 
 _initialized = False
 
+# Claims of recently verified tokens, keyed by a digest of the token and
+# stored with the token's ``exp`` time.  Hits are re-inserted and dicts
+# preserve insertion order, so the least recently used entry is evicted
+# first once the cache is full.
+_TOKEN_CACHE: Dict[bytes, Tuple[Dict[str, Any], int]] = {}
+_TOKEN_CACHE_MAX_ENTRIES = 512
+# Cached claims are not reused within this many seconds of token expiry
+_TOKEN_EXPIRY_LEEWAY = 5
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
 
 def _init_firebase():
     global _initialized
@@ -37,19 +52,44 @@ def _init_firebase():
     _initialized = True
 
 
+# Initialise at import time so the Admin SDK setup happens once per container
+# (during the Lambda init phase) rather than on the first request.
+_init_firebase()
+
+
+def _verify_token(token: str) -> Dict[str, Any]:
+    """Verify ``token`` and return its claims.
+
+    Repeated requests with the same token within a warm container are served
+    from ``_TOKEN_CACHE`` until shortly before the token expires, skipping
+    the signature check.  Revocation is not checked, matching the default
+    behaviour of ``verify_id_token``.
+    """
+    digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = _TOKEN_CACHE.pop(digest, None)
+    if cached and cached[1] > time.time() + _TOKEN_EXPIRY_LEEWAY:
+        _TOKEN_CACHE[digest] = cached
+        return cached[0]
+
+    decoded = auth.verify_id_token(token, check_revoked=False)
+    if len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAX_ENTRIES:
+        del _TOKEN_CACHE[next(iter(_TOKEN_CACHE))]
+    _TOKEN_CACHE[digest] = (decoded, int(decoded["exp"]))
+    return decoded
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    _init_firebase()
     headers = event.get("headers") or {}
     auth_header = headers.get("authorization") or headers.get("Authorization")
     if not auth_header:
-        return {"statusCode": 401, "body": json.dumps({"error": "Missing Authorization header"})}
+        return {"statusCode": 401, "body": _dumps({"error": "Missing Authorization header"})}
     # Expect format "Bearer <token>"
     parts = auth_header.split()
     if len(parts) != 2 or parts[0].lower() != "bearer":
-        return {"statusCode": 401, "body": json.dumps({"error": "Invalid authorization format"})}
+        return {"statusCode": 401, "body": _dumps({"error": "Invalid authorization format"})}
     token = parts[1]
     try:
-        decoded = auth.verify_id_token(token)
-        return {"statusCode": 200, "body": json.dumps({"claims": decoded})}
+        decoded = _verify_token(token)
+        return {"statusCode": 200, "body": _dumps({"claims": decoded})}
     except Exception as exc:
-        return {"statusCode": 401, "body": json.dumps({"error": f"Token verification failed: {exc}"})}
\ No newline at end of file
+        return {"statusCode": 401, "body": _dumps({"error": f"Token verification failed: {exc}"})}
\ No newline at end of file
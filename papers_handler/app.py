@@ -11,7 +11,7 @@ following values:
   triggered, this action fetches the UPSC Civil Services Preliminary 2024
   General Studies papers and the SSC model question paper (English) from
   official UPSC and SSC websites and stores them in the bucket.  You can add
-  additional URLs to the ``exam_urls`` mapping as more resources become
+  additional URLs to the ``_EXAM_URLS`` table as more resources become
   available.
 
 * ``list_papers`` – Return a list of keys for all objects currently stored
@@ -28,12 +28,44 @@ configure a bucket via the ``BUCKET_NAME`` environment variable in
 ``template.yaml``.
 """
 
-import json
 import os
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple
 
 import boto3
+import orjson
 import requests
+from boto3.s3.transfer import TransferConfig
+from requests.adapters import HTTPAdapter
+
+# Exam identifiers and their official PDF URLs.
+# These URLs were curated from official UPSC and SSC websites during initial development.
+_EXAM_URLS: Tuple[Tuple[str, str], ...] = (
+    ("UPSC_Civil_Services_Prelims_2024_GS_Paper_I", "https://upsc.gov.in/sites/default/files/QP-CSP-24-GENERAL-STUDIES-PAPER-I-180624.pdf"),
+    ("UPSC_Civil_Services_Prelims_2024_GS_Paper_II", "https://upsc.gov.in/sites/default/files/QP-CSP-24-GENERAL-STUDIES-PAPER-II-180624.pdf"),
+    ("SSC_Model_Question_Paper_English", "https://ssc.nic.in/Downloads/portal/english/modal-question-paper-english.pdf"),
+)
+
+# Upper bound on concurrent paper downloads; the HTTP pool is sized to match.
+_MAX_DOWNLOAD_WORKERS = 16
+
+# Created once per container so that S3 and upstream HTTP connections are
+# kept alive and reused across warm invocations.
+_S3 = boto3.client("s3")
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=_MAX_DOWNLOAD_WORKERS))
+_HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=_MAX_DOWNLOAD_WORKERS))
+
+# Papers larger than one part are uploaded as concurrent 8 MiB parts.
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
 
 
 def _download_and_store(url: str, key: str, bucket: str, s3_client: boto3.client) -> None:
@@ -45,10 +77,18 @@ def _download_and_store(url: str, key: str, bucket: str, s3_client: boto3.client
         bucket: Name of the destination S3 bucket.
         s3_client: boto3 S3 client instance.
     """
-    response = requests.get(url)
-    response.raise_for_status()
-    # Upload the binary content directly to S3
-    s3_client.put_object(Bucket=bucket, Key=key, Body=response.content, ContentType="application/pdf")
+    with _HTTP_SESSION.get(url, stream=True) as response:
+        response.raise_for_status()
+        # Stream the body straight into a (multipart) S3 upload rather than
+        # materialising the whole PDF in memory first
+        response.raw.decode_content = True
+        s3_client.upload_fileobj(
+            response.raw,
+            bucket,
+            key,
+            Config=_TRANSFER_CONFIG,
+            ExtraArgs={"ContentType": "application/pdf"},
+        )
 
 
 def _handle_download_papers(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -60,31 +100,29 @@ def _handle_download_papers(event: Dict[str, Any]) -> Dict[str, Any]:
     if not bucket_name:
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "BUCKET_NAME environment variable not set"}),
+            "body": _dumps({"error": "BUCKET_NAME environment variable not set"}),
         }
 
-    # Map exam identifiers to their official PDF URLs.
-    # These URLs were curated from official UPSC and SSC websites during initial development.
-    exam_urls: Dict[str, str] = {
-        "UPSC_Civil_Services_Prelims_2024_GS_Paper_I": "https://upsc.gov.in/sites/default/files/QP-CSP-24-GENERAL-STUDIES-PAPER-I-180624.pdf",
-        "UPSC_Civil_Services_Prelims_2024_GS_Paper_II": "https://upsc.gov.in/sites/default/files/QP-CSP-24-GENERAL-STUDIES-PAPER-II-180624.pdf",
-        "SSC_Model_Question_Paper_English": "https://ssc.nic.in/Downloads/portal/english/modal-question-paper-english.pdf",
-    }
-
-    s3_client = boto3.client("s3")
+    # Papers are independent, so download and upload them concurrently; the
+    # wall time is then roughly that of the slowest paper.
     saved_keys: List[str] = []
-    for name, url in exam_urls.items():
-        key = f"{name}.pdf"
-        try:
-            _download_and_store(url, key, bucket_name, s3_client)
-            saved_keys.append(key)
-        except Exception as exc:  # broad catch to ensure all papers attempt
-            # Log the error into the saved list with the error message
-            saved_keys.append(f"{key}: error {exc}")
+    with ThreadPoolExecutor(max_workers=min(_MAX_DOWNLOAD_WORKERS, len(_EXAM_URLS))) as executor:
+        futures = {
+            executor.submit(_download_and_store, url, f"{name}.pdf", bucket_name, _S3): f"{name}.pdf"
+            for name, url in _EXAM_URLS
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                future.result()
+                saved_keys.append(key)
+            except Exception as exc:  # broad catch to ensure all papers attempt
+                # Log the error into the saved list with the error message
+                saved_keys.append(f"{key}: error {exc}")
 
     return {
         "statusCode": 200,
-        "body": json.dumps({"saved": saved_keys}),
+        "body": _dumps({"saved": saved_keys}),
     }
 
 
@@ -97,14 +135,18 @@ def _handle_list_papers(event: Dict[str, Any]) -> Dict[str, Any]:
     if not bucket_name:
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "BUCKET_NAME environment variable not set"}),
+            "body": _dumps({"error": "BUCKET_NAME environment variable not set"}),
         }
-    s3_client = boto3.client("s3")
-    response = s3_client.list_objects_v2(Bucket=bucket_name)
-    keys = [item["Key"] for item in response.get("Contents", [])]
+    # list_objects_v2 returns at most 1000 keys per call, so walk every page
+    paginator = _S3.get_paginator("list_objects_v2")
+    keys = [
+        item["Key"]
+        for page in paginator.paginate(Bucket=bucket_name)
+        for item in page.get("Contents", [])
+    ]
     return {
         "statusCode": 200,
-        "body": json.dumps({"files": keys}),
+        "body": _dumps({"files": keys}),
     }
 
 
@@ -123,5 +165,5 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     else:
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": f"Unsupported action: {action}"}),
+            "body": _dumps({"error": f"Unsupported action: {action}"}),
         }
\ No newline at end of file
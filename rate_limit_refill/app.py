@@ -0,0 +1,45 @@
+"""
+Scheduled Lambda that refills the OpenAI request budget shared by the
+GenerateQuiz, FlashcardGenerator and SummarizeContent functions.
+
+The budget is a token bucket stored as a single DynamoDB item.  Callers
+atomically decrement its ``tokens`` attribute before each OpenAI request
+(creating the item as a full bucket if it doesn't exist yet) and are turned
+away once it reaches zero; this function runs every minute and resets it, so that the total request rate across all concurrent
+invocations stays below the account's requests-per-minute limit.
+
+Environment variables:
+
+* ``RATE_LIMIT_TABLE`` – name of the DynamoDB table holding the bucket.
+* ``OPENAI_REQUESTS_PER_MINUTE`` – size of the bucket (default 60).
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+import boto3
+
+# Created once per container and reused across warm invocations
+_DDB = boto3.client("dynamodb")
+
+# Item of the shared OpenAI request budget
+_RATE_LIMIT_KEY = {"id": {"S": "openai"}}
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    table_name = os.environ["RATE_LIMIT_TABLE"]
+    requests_per_minute = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "60"))
+
+    # Unused tokens don't carry over: the bucket is reset rather than topped
+    # up so that an idle minute can't allow a burst above the limit.
+    _DDB.update_item(
+        TableName=table_name,
+        Key=_RATE_LIMIT_KEY,
+        UpdateExpression="SET tokens = :rpm, refilledAt = :now",
+        ExpressionAttributeValues={
+            ":rpm": {"N": str(requests_per_minute)},
+            ":now": {"N": str(int(time.time()))},
+        },
+    )
+    return {"tokens": requests_per_minute}
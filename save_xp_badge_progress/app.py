@@ -2,8 +2,9 @@
 Lambda to record XP and badge progress for users.  This function accepts
 activities sent by the front‑end and updates a DynamoDB table with the
 user's running totals.  It supports arbitrary increments of XP and a
-simple streak mechanism that increments when the user completes an action
-within a 24‑hour window.
+daily streak: the streak grows by one on the first activity of a (UTC) day
+that follows an active day, stays unchanged for further activity on the
+same day, and restarts at one after a missed day.
 
 Expected input JSON:
 
@@ -20,48 +21,99 @@ Environment variables:
 * ``PROGRESS_TABLE`` – name of the DynamoDB table tracking user progress.
 """
 
-import json
+import base64
 import os
 import time
 from typing import Any, Dict
 
 import boto3
+import orjson
+
+# Created once per container and reused across warm invocations.  Only a
+# handful of integer attributes are touched, so they are (un)marshalled by
+# hand rather than through the resource API.
+_DDB = boto3.client("dynamodb")
+
+_SECONDS_PER_DAY = 86400
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _from_attributes(item: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Convert a DynamoDB item of string and (integer) number attributes."""
+    return {name: int(value["N"]) if "N" in value else value.get("S") for name, value in item.items()}
+
+
+def _parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON body of an API Gateway proxy event.
+
+    ``orjson`` parses bytes directly, so a base64-encoded body is decoded
+    straight into the parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
-        body = event.get("body") or "{}"
-        if event.get("isBase64Encoded"):
-            import base64
-            body = base64.b64decode(body).decode()
-        payload = json.loads(body)
+        payload = _parse_body(event)
         user_id = payload["userId"]
         xp = int(payload.get("xp", 0))
-    except (KeyError, json.JSONDecodeError, ValueError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
+    except (KeyError, orjson.JSONDecodeError, ValueError) as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
 
     table_name = os.environ.get("PROGRESS_TABLE")
     if not table_name:
-        return {"statusCode": 500, "body": json.dumps({"error": "PROGRESS_TABLE not configured"})}
+        return {"statusCode": 500, "body": _dumps({"error": "PROGRESS_TABLE not configured"})}
 
-    dynamodb = boto3.resource("dynamodb")
-    table = dynamodb.Table(table_name)
     now = int(time.time())
+    today = now // _SECONDS_PER_DAY
+    key = {"userId": {"S": user_id}}
 
-    # Use an update expression to atomically increment XP and streaks
-    # We maintain attributes: xp, streak, lastActivity
-    response = table.update_item(
-        Key={"userId": user_id},
-        UpdateExpression="SET xp = if_not_exists(xp, :zero) + :xp, "
-                         "lastActivity = :now, "
-                         "streak = if_not_exists(streak, :zero) + :one",
+    # Atomically add the XP and record the activity time.  The returned item
+    # tells us which day the streak was last advanced on.
+    # We maintain attributes: xp, streak, lastActivity, lastActiveDay
+    response = _DDB.update_item(
+        TableName=table_name,
+        Key=key,
+        UpdateExpression="SET xp = if_not_exists(xp, :zero) + :xp, lastActivity = :now",
         ExpressionAttributeValues={
-            ":xp": xp,
-            ":zero": 0,
-            ":now": now,
-            ":one": 1,
+            ":xp": {"N": str(xp)},
+            ":zero": {"N": "0"},
+            ":now": {"N": str(now)},
         },
         ReturnValues="ALL_NEW",
     )
-    new_item = response.get("Attributes", {})
-    return {"statusCode": 200, "body": json.dumps({"progress": new_item})}
\ No newline at end of file
+    new_item = _from_attributes(response.get("Attributes", {}))
+
+    # Only the first activity of a day needs a second write: continue the
+    # streak if the user was active yesterday, otherwise restart it.  The
+    # condition guards against a concurrent request advancing it first.
+    last_day = new_item.get("lastActiveDay")
+    if last_day != today:
+        streak = new_item.get("streak", 0) + 1 if last_day == today - 1 else 1
+        values: Dict[str, Any] = {":streak": {"N": str(streak)}, ":today": {"N": str(today)}}
+        if last_day is None:
+            condition = "attribute_not_exists(lastActiveDay)"
+        else:
+            condition = "lastActiveDay = :seen"
+            values[":seen"] = {"N": str(last_day)}
+        try:
+            response = _DDB.update_item(
+                TableName=table_name,
+                Key=key,
+                UpdateExpression="SET streak = :streak, lastActiveDay = :today",
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+            )
+            new_item = _from_attributes(response.get("Attributes", {}))
+        except _DDB.exceptions.ConditionalCheckFailedException:
+            # Another request already advanced the streak for today
+            pass
+
+    return {"statusCode": 200, "body": _dumps({"progress": new_item})}
\ No newline at end of file
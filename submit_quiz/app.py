@@ -15,50 +15,217 @@ Expected input JSON:
 }
 ```
 
+Several quizzes can be submitted at once by sending a ``submissions`` list
+of ``{"quizId", "answers", "correctAnswers"}`` objects alongside
+``userId``; the response then contains a ``scores`` list in the same order.
+
+Besides one item per quiz, the table holds a per-user rollup item (sort key
+``__stats__``) with running ``totalScore`` and ``totalQuizzes`` counters so
+that the GetPerformance Lambda can read aggregates with a single
+``GetItem``.
+
 Environment variables:
 
 * ``QUIZ_RESULTS_TABLE`` – name of the DynamoDB table where results should
   be stored.
 """
 
-import json
+import base64
 import os
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import boto3
+import numpy as np
+import orjson
+
+# Created once per container and reused across warm invocations (low-level
+# client: items are written as typed AttributeValues)
+_DDB = boto3.client("dynamodb")
+
+# Sort key of the per-user rollup item holding running totals
+_STATS_QUIZ_ID = "__stats__"
+# A transaction holds at most 100 actions, one of which updates the rollup
+_MAX_SUBMISSIONS = 99
+# Attempts at writing results before reporting a conflict
+_MAX_TRANSACTION_ATTEMPTS = 3
+# Backoff between retried DynamoDB requests
+_BACKOFF_BASE_SECONDS = 0.05
+_BACKOFF_MAX_SECONDS = 1.0
+# Below this many questions a plain loop beats building NumPy arrays
+_NUMPY_MIN_QUESTIONS = 64
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON body of an API Gateway proxy event.
+
+    ``orjson`` parses bytes directly, so a base64-encoded body is decoded
+    straight into the parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
+
+
+def _all_str(*sequences: List[Any]) -> bool:
+    """Whether every element is a ``str``.
+
+    NumPy coerces mixed lists to a common string dtype (``1`` and ``"1"``
+    would compare equal), so only all-string answers take the array path.
+    """
+    return all(type(value) is str for sequence in sequences for value in sequence)
+
+
+def _score(answers: List[str], correct_answers: List[str]) -> int:
+    """Count the answers that match the correct answer at the same position."""
+    count = min(len(answers), len(correct_answers))
+    if count < _NUMPY_MIN_QUESTIONS or not _all_str(answers[:count], correct_answers[:count]):
+        return sum(1 for a, c in zip(answers, correct_answers) if a == c)
+    return int(np.count_nonzero(np.asarray(answers[:count]) == np.asarray(correct_answers[:count])))
+
+
+def _score_all(entries: List[Tuple[str, List[str], List[str]]]) -> List[int]:
+    """Score every ``(quizId, answers, correctAnswers)`` entry.
+
+    When a batch of long quizzes all have the same number of questions they
+    are stacked into 2-D arrays and scored with a single comparison.
+    """
+    lengths = {len(answers) for _, answers, _ in entries} | {len(correct) for _, _, correct in entries}
+    if (
+        len(entries) > 1
+        and len(lengths) == 1
+        and lengths.pop() >= _NUMPY_MIN_QUESTIONS
+        and _all_str(*(answers for _, answers, _ in entries), *(correct for _, _, correct in entries))
+    ):
+        answers = np.asarray([answers for _, answers, _ in entries])
+        correct = np.asarray([correct for _, _, correct in entries])
+        return np.count_nonzero(answers == correct, axis=1).tolist()
+    return [_score(answers, correct_answers) for _, answers, correct_answers in entries]
+
+
+def _existing_scores(table_name: str, user_id: str, quiz_ids: List[str]) -> Dict[str, int]:
+    """Return the stored score of each of ``quiz_ids`` that was already submitted."""
+    request: Dict[str, Any] = {
+        table_name: {
+            "Keys": [{"userId": {"S": user_id}, "quizId": {"S": quiz_id}} for quiz_id in quiz_ids],
+            "ProjectionExpression": "quizId, #score",
+            "ExpressionAttributeNames": {"#score": "score"},
+            "ConsistentRead": True,
+        }
+    }
+    scores: Dict[str, int] = {}
+    attempt = 0
+    while request:
+        if attempt:
+            # Unprocessed keys mean the table is throttling; back off
+            time.sleep(min(_BACKOFF_BASE_SECONDS * 2 ** attempt, _BACKOFF_MAX_SECONDS))
+        response = _DDB.batch_get_item(RequestItems=request)
+        for item in response.get("Responses", {}).get(table_name, []):
+            scores[item["quizId"]["S"]] = int(item.get("score", {}).get("N", 0))
+        request = response.get("UnprocessedKeys")
+        attempt += 1
+    return scores
+
+
+def _store_results(table_name: str, user_id: str, items: Dict[str, Dict[str, Any]]) -> bool:
+    """Write ``items`` and apply their score deltas to the user's rollup item.
+
+    The results and the rollup update go in one transaction.  Each put is
+    conditioned on the score read beforehand, so a concurrent resubmission
+    cancels the transaction instead of being counted twice; it is then
+    retried with fresh scores.  The ``ADD`` is unconditional and also bumps
+    ``version``, which GetPerformance uses to seed the rollup safely.
+    Returns ``False`` if the transaction kept being cancelled.
+    """
+    for attempt in range(_MAX_TRANSACTION_ATTEMPTS):
+        if attempt:
+            time.sleep(min(_BACKOFF_BASE_SECONDS * 2 ** attempt, _BACKOFF_MAX_SECONDS))
+        previous = _existing_scores(table_name, user_id, list(items))
+        actions: List[Dict[str, Any]] = []
+        for quiz_id, item in items.items():
+            put: Dict[str, Any] = {"TableName": table_name, "Item": item}
+            if quiz_id in previous:
+                put["ConditionExpression"] = "#score = :old"
+                put["ExpressionAttributeNames"] = {"#score": "score"}
+                put["ExpressionAttributeValues"] = {":old": {"N": str(previous[quiz_id])}}
+            else:
+                put["ConditionExpression"] = "attribute_not_exists(quizId)"
+            actions.append({"Put": put})
+        actions.append({
+            "Update": {
+                "TableName": table_name,
+                "Key": {"userId": {"S": user_id}, "quizId": {"S": _STATS_QUIZ_ID}},
+                "UpdateExpression": "ADD totalScore :score, totalQuizzes :quizzes, version :one",
+                "ExpressionAttributeValues": {
+                    ":score": {"N": str(sum(int(item["score"]["N"]) for item in items.values()) - sum(previous.values()))},
+                    ":quizzes": {"N": str(len(items) - len(previous))},
+                    ":one": {"N": "1"},
+                },
+            }
+        })
+        try:
+            _DDB.transact_write_items(TransactItems=actions)
+            return True
+        except _DDB.exceptions.TransactionCanceledException:
+            continue
+    return False
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Parse input
     try:
-        body = event.get("body") or "{}"
-        if event.get("isBase64Encoded"):
-            import base64
-            body = base64.b64decode(body).decode()
-        payload = json.loads(body)
+        payload = _parse_body(event)
         user_id = payload["userId"]
-        quiz_id = payload.get("quizId", "unknown")
-        answers: List[str] = payload["answers"]
-        correct_answers: List[str] = payload["correctAnswers"]
-    except (KeyError, json.JSONDecodeError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
+        batch = "submissions" in payload
+        submissions = payload["submissions"] if batch else [payload]
+        if (
+            not isinstance(submissions, list)
+            or not 0 < len(submissions) <= _MAX_SUBMISSIONS
+            or not all(isinstance(item, dict) for item in submissions)
+        ):
+            return {
+                "statusCode": 400,
+                "body": _dumps({"error": f"'submissions' must be a list of 1 to {_MAX_SUBMISSIONS} objects"}),
+            }
+        entries = [
+            (item.get("quizId", "unknown"), item["answers"], item["correctAnswers"])
+            for item in submissions
+        ]
+    except (KeyError, orjson.JSONDecodeError) as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
+    if any(quiz_id == _STATS_QUIZ_ID for quiz_id, _, _ in entries):
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid quizId: {_STATS_QUIZ_ID}"})}
 
-    # Calculate score
-    score = sum(1 for a, c in zip(answers, correct_answers) if a == c)
+    # Calculate scores
+    scores = _score_all(entries)
 
-    # Persist result to DynamoDB
+    # Persist results to DynamoDB
     table_name = os.environ.get("QUIZ_RESULTS_TABLE")
     if table_name:
-        dynamodb = boto3.resource("dynamodb")
-        table = dynamodb.Table(table_name)
-        item = {
-            "userId": user_id,
-            "quizId": quiz_id,
-            "timestamp": int(time.time()),
-            "score": score,
-            "totalQuestions": len(correct_answers),
+        now = str(int(time.time()))
+        # A later submission of the same quiz replaces the earlier one
+        items = {
+            quiz_id: {
+                "userId": {"S": user_id},
+                "quizId": {"S": quiz_id},
+                "timestamp": {"N": now},
+                "score": {"N": str(score)},
+                "totalQuestions": {"N": str(len(correct_answers))},
+            }
+            for (quiz_id, _, correct_answers), score in zip(entries, scores)
         }
-        table.put_item(Item=item)
+        if not _store_results(table_name, user_id, items):
+            return {
+                "statusCode": 409,
+                "headers": {"Retry-After": "1"},
+                "body": _dumps({"error": "Conflicting submission in progress, please retry"}),
+            }
 
-    return {"statusCode": 200, "body": json.dumps({"score": score})}
\ No newline at end of file
+    if batch:
+        return {"statusCode": 200, "body": _dumps({"scores": scores})}
+    return {"statusCode": 200, "body": _dumps({"score": scores[0]})}
\ No newline at end of file
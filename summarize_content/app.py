@@ -8,17 +8,394 @@ returns a concise summary.
 If ``OPENAI_API_KEY`` is not set, a fallback summarizer returns the first
 1000 characters of the input text to allow local testing without external
 dependencies.
+
+When ``SUMMARY_CACHE_TABLE`` is set, LLM summaries are cached in that
+DynamoDB table keyed by the SHA-256 of the input text (or of the decoded
+PDF, so that a re-uploaded PDF isn't even re-extracted) and expire after
+30 days.
+
+Long inputs are split into at most 8 chunks that are summarised
+concurrently; the partial summaries are then merged with one final request.
+Chunks grow with the input up to about 10k tokens each, so roughly 320k
+characters can be summarised; text beyond that is left out and the response
+carries ``"truncated": true``.  All OpenAI
+requests of an invocation share one deadline that leaves time to answer
+before API Gateway's 29 s integration timeout; the function answers 504
+with a ``Retry-After`` header once it is reached.
+
+If ``RATE_LIMIT_TABLE`` is set, every OpenAI request, retries included,
+first takes a token from the request budget shared with the other
+OpenAI-backed functions, and the function answers 429 while it is spent.
+
+Instead of re-sending an uploaded PDF, clients can pass the ``s3Key``
+returned by the UploadHandler.  The text ExtractText already wrote for it
+(``extracted/<name>.txt`` in ``EXTRACTED_BUCKET_NAME``) is summarised.
+While there is none, the upload in ``UPLOADS_BUCKET_NAME`` tells apart a
+pending extraction (503 with ``Retry-After``) from one that will never
+happen: 404 if nothing was uploaded under the key, 422 if it isn't a PDF
+or extraction should long have finished.
 """
 
-import json
+import base64
+import hashlib
 import os
-from typing import Any, Dict
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import msgspec
+import orjson
+from botocore.exceptions import BotoCoreError, ClientError
 
 try:
+    # SIMD base64 decoding for inline PDFs when the wheel is available
+    from pybase64 import b64decode as _b64decode  # type: ignore
+except ImportError:
+    from base64 import b64decode as _b64decode
+
+try:
+    import httpx
     import openai  # type: ignore
 except ImportError:
     openai = None  # fallback if openai isn't installed
 
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except ImportError:
+    pdfium = None  # only needed for the ``fileContent`` branch
+
+# A single completion attempt is abandoned after this long, or earlier if
+# the invocation's deadline comes first.  Retries are made by ``_summarize``
+# (so that each one takes a rate limiter token) and only while at least
+# ``_MIN_ATTEMPT_SECONDS`` remain.
+_REQUEST_TIMEOUT_SECONDS = 8
+_MIN_ATTEMPT_SECONDS = 3
+_MAX_ATTEMPTS = 3
+_MAX_BACKOFF_SECONDS = 2
+# OpenAI requests have to be done this long before API Gateway's 29 s
+# integration timeout (or the function's own timeout) so that the response
+# can still be cached and returned
+_API_GATEWAY_TIMEOUT_SECONDS = 29
+_DEADLINE_MARGIN_SECONDS = 2
+# Concurrent chunk requests, kept low to stay clear of the per-minute
+# request and token limits
+_MAX_PARALLEL_REQUESTS = 4
+
+if openai:
+    # Created at import so that provisioned instances start ready; without
+    # an API key the fallback summariser is used instead.  The HTTP/2
+    # connection is kept alive between warm invocations and the parallel
+    # chunk requests are multiplexed over it.
+    _API_KEY = os.environ.get("OPENAI_API_KEY")
+    _TIMEOUT = httpx.Timeout(_REQUEST_TIMEOUT_SECONDS, connect=5.0)
+    _OPENAI = (
+        openai.OpenAI(
+            api_key=_API_KEY,
+            timeout=_TIMEOUT,
+            max_retries=0,
+            http_client=httpx.Client(
+                http2=True,
+                timeout=_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=_MAX_PARALLEL_REQUESTS),
+            ),
+        )
+        if _API_KEY
+        else None
+    )
+    # Errors that are retried while the deadline allows
+    _RETRYABLE_ERRORS: Tuple[type, ...] = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+else:
+    _OPENAI = None
+    _RETRYABLE_ERRORS = ()
+
+# Created once per container and reused across warm invocations
+_DDB = boto3.client("dynamodb")
+_S3 = boto3.client("s3")
+
+# Cached summaries are expired by DynamoDB's TTL after this long
+_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+# Request bodies above this size are refused with 413 before the JSON or
+# the PDF inside it is decoded
+_MAX_BODY_BYTES = 6 * 1024 * 1024
+
+# Sent as ``Retry-After`` when OpenAI is still failing once retries run out
+_CLIENT_RETRY_AFTER_SECONDS = 5
+# Sent as ``Retry-After`` while the text of an upload is being extracted
+_EXTRACTION_RETRY_AFTER_SECONDS = 2
+# ExtractText runs for up to 5 minutes and S3 retries a failed invocation
+# twice; an upload without text after this long has failed extraction
+_EXTRACTION_GRACE_SECONDS = 30 * 60
+
+# Item of the shared OpenAI request budget in the ``RATE_LIMIT_TABLE`` table
+_RATE_LIMIT_KEY = {"id": {"S": "openai"}}
+
+_SUMMARY_PROMPT = "You are a helpful assistant that summarises study material."
+_MERGE_PROMPT = (
+    "You are a helpful assistant that summarises study material. The user message contains "
+    "summaries of consecutive parts of one document; combine them into a single concise summary."
+)
+# Inputs longer than this (roughly 3k tokens) are summarised chunk by chunk
+_CHUNK_CHARS = 12_000
+# At most this many chunks are sent.  With ``_MAX_PARALLEL_REQUESTS`` workers
+# that is two rounds of chunk requests plus the merge, which fits the
+# deadline even when every request runs to its timeout.
+_MAX_CHUNKS = 8
+# Longer inputs get proportionally larger chunks, up to roughly 10k tokens so
+# that prompt and reply stay within gpt-3.5-turbo's 16k-token context; text
+# beyond ``_MAX_CHUNKS`` chunks of this size is left out.
+_MAX_CHUNK_CHARS = 40_000
+
+
+class _DeadlineExceeded(Exception):
+    """Raised when no time is left in the invocation for another request."""
+
+
+class _BudgetExhausted(Exception):
+    """Raised when the shared OpenAI request budget is spent."""
+
+
+class _SummarizeRequest(msgspec.Struct):
+    """JSON body of a summarize request; one of the sources is expected."""
+
+    text: str | None = None
+    s3Key: str | None = None
+    fileContent: str | None = None
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> _SummarizeRequest:
+    """Decode and validate the JSON body of an API Gateway proxy event.
+
+    The body is parsed straight into a ``_SummarizeRequest``, so field
+    types are checked by ``msgspec`` during decoding.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return msgspec.json.decode(body, type=_SummarizeRequest)
+
+
+def _pdf_text(pdf_bytes: bytes) -> str:
+    """Return the plain text of every page in ``pdf_bytes``.
+
+    Page texts are collected in a list and joined once, and every PDFium
+    handle is closed as soon as it has been read so that native memory is
+    released promptly.
+    """
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(texts)
+    finally:
+        pdf.close()
+
+
+def _deadline(context: Any) -> float:
+    """Return the ``time.monotonic()`` by which OpenAI requests must be done."""
+    budget = _API_GATEWAY_TIMEOUT_SECONDS
+    if context is not None:
+        budget = min(budget, context.get_remaining_time_in_millis() / 1000)
+    return time.monotonic() + budget - _DEADLINE_MARGIN_SECONDS
+
+
+def _acquire_openai_token() -> bool:
+    """Take one request from the OpenAI budget shared by all functions.
+
+    The budget is a token bucket held in a single DynamoDB item that the
+    RateLimitRefill function resets every minute; the conditional decrement
+    fails once it is empty.  Until the first refill has run (right after a
+    deploy) the missing bucket is treated as full.  The limiter is disabled when
+    ``RATE_LIMIT_TABLE`` isn't set, and fails open if DynamoDB itself errors.
+    """
+    table_name = os.environ.get("RATE_LIMIT_TABLE")
+    if not table_name:
+        return True
+    try:
+        _DDB.update_item(
+            TableName=table_name,
+            Key=_RATE_LIMIT_KEY,
+            UpdateExpression="SET tokens = if_not_exists(tokens, :full) - :one",
+            ConditionExpression="attribute_not_exists(tokens) OR tokens > :zero",
+            ExpressionAttributeValues={
+                ":full": {"N": os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "60")},
+                ":one": {"N": "1"},
+                ":zero": {"N": "0"},
+            },
+        )
+    except _DDB.exceptions.ConditionalCheckFailedException:
+        return False
+    except (ClientError, BotoCoreError):
+        pass
+    return True
+
+
+def _retry_after(exc: Exception, attempt: int) -> float:
+    """Honour the server's ``Retry-After`` header, else back off with jitter."""
+    response = getattr(exc, "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), _MAX_BACKOFF_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(0.5 * 2 ** attempt, _MAX_BACKOFF_SECONDS))
+
+
+def _summarize(text: str, deadline: float, instruction: str = _SUMMARY_PROMPT) -> str:
+    """Summarise ``text`` with the chat completion API before ``deadline``.
+
+    Every attempt takes a rate limiter token and is timed out at the
+    deadline at the latest.  Timeouts, rate limits and server errors are
+    retried while time remains; the last one is re-raised otherwise.
+    Raises ``_DeadlineExceeded`` if no attempt could be started and
+    ``_BudgetExhausted`` if no token was left.
+    """
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining < _MIN_ATTEMPT_SECONDS:
+            raise _DeadlineExceeded()
+        if not _acquire_openai_token():
+            raise _BudgetExhausted()
+        try:
+            response = _OPENAI.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": instruction},
+                    {"role": "user", "content": text},
+                ],
+                temperature=0.5,
+                max_tokens=300,
+                timeout=min(_REQUEST_TIMEOUT_SECONDS, remaining),
+            )
+            return response.choices[0].message.content.strip()
+        except _RETRYABLE_ERRORS as exc:
+            attempt += 1
+            delay = _retry_after(exc, attempt)
+            if attempt == _MAX_ATTEMPTS or deadline - time.monotonic() - delay < _MIN_ATTEMPT_SECONDS:
+                raise
+            time.sleep(delay)
+
+
+def _chunks(text: str) -> Tuple[List[str], bool]:
+    """Split ``text`` into at most ``_MAX_CHUNKS`` pieces.
+
+    Pieces are ``_CHUNK_CHARS`` long, or longer (up to ``_MAX_CHUNK_CHARS``)
+    when that many wouldn't cover the text.  They end at a line break in
+    their last tenth where possible so that paragraphs aren't cut in half.
+    Returns the pieces and whether text had to be left out.
+    """
+    # Pieces shortened by a line break still cover the whole text
+    size = min(max(_CHUNK_CHARS, -(-len(text) * 10 // (9 * _MAX_CHUNKS))), _MAX_CHUNK_CHARS)
+    chunks = []
+    start = 0
+    while start < len(text) and len(chunks) < _MAX_CHUNKS:
+        end = start + size
+        if end < len(text):
+            cut = text.rfind("\n", end - size // 10, end)
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end])
+        start = end
+    return chunks, start < len(text)
+
+
+def _summarize_long(text: str, deadline: float) -> Tuple[str, bool]:
+    """Summarise ``text`` of any length before ``deadline``.
+
+    Inputs that fit in one chunk take a single request.  Longer inputs are
+    mapped to partial summaries in parallel threads and reduced with one
+    more request, so wall time grows with the number of rounds rather than
+    the number of chunks.  Returns the summary and whether part of the text
+    was left out.
+    """
+    chunks, truncated = _chunks(text)
+    if len(chunks) == 1:
+        return _summarize(chunks[0], deadline), truncated
+    with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL_REQUESTS, len(chunks))) as executor:
+        partials = list(executor.map(lambda chunk: _summarize(chunk, deadline), chunks))
+    return _summarize("\n\n".join(partials), deadline, _MERGE_PROMPT), truncated
+
+
+def _cached_summary(table_name: str, key: str) -> Tuple[str, bool] | None:
+    """Return the cached summary stored under ``key`` and whether it is partial."""
+    try:
+        response = _DDB.get_item(
+            TableName=table_name,
+            Key={"hash": {"S": key}},
+            ProjectionExpression="summary, truncated",
+        )
+    except (ClientError, BotoCoreError):
+        # The cache is only an optimisation; treat errors as a miss
+        return None
+    item = response.get("Item")
+    if not item:
+        return None
+    return item["summary"]["S"], item.get("truncated", {}).get("BOOL", False)
+
+
+def _store_summary(table_name: str, key: str, summary: str, truncated: bool) -> None:
+    """Cache ``summary`` under ``key`` for ``_CACHE_TTL_SECONDS``."""
+    try:
+        _DDB.put_item(
+            TableName=table_name,
+            Item={
+                "hash": {"S": key},
+                "summary": {"S": summary},
+                "truncated": {"BOOL": truncated},
+                "expiresAt": {"N": str(int(time.time()) + _CACHE_TTL_SECONDS)},
+            },
+        )
+    except (ClientError, BotoCoreError):
+        pass
+
+
+def _missing_text_response(s3_key: str) -> Dict[str, Any]:
+    """Build the response for an ``s3Key`` whose text hasn't been extracted.
+
+    The upload itself is looked up so that clients only keep polling while
+    an extraction can still be in progress.
+    """
+    uploads_bucket = os.environ.get("UPLOADS_BUCKET_NAME")
+    if uploads_bucket:
+        try:
+            upload = _S3.head_object(Bucket=uploads_bucket, Key=s3_key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return {"statusCode": 404, "body": _dumps({"error": "No upload found for s3Key"})}
+        else:
+            # ExtractText's S3 trigger only matches keys ending in ``.pdf``
+            if not s3_key.endswith(".pdf"):
+                return {"statusCode": 422, "body": _dumps({"error": "Only PDF uploads can be summarised"})}
+            if time.time() - upload["LastModified"].timestamp() > _EXTRACTION_GRACE_SECONDS:
+                return {"statusCode": 422, "body": _dumps({"error": "Text could not be extracted from the upload"})}
+    # Extraction runs asynchronously after the upload
+    return {
+        "statusCode": 503,
+        "headers": {"Retry-After": str(_EXTRACTION_RETRY_AFTER_SECONDS)},
+        "body": _dumps({"error": "Extracted text not available yet"}),
+    }
+
+
+def _summary_body(summary: str, truncated: bool) -> Dict[str, Any]:
+    """Build the response body; partial summaries are flagged as such."""
+    if truncated:
+        return {"summary": summary, "truncated": True}
+    return {"summary": summary}
+
 
 def _fallback_summary(text: str) -> str:
     """Return a truncated version of the input as a fallback summary."""
@@ -32,70 +409,118 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     returns a concise summary.  It is intended to power the `/summarize`
     endpoint consumed by the Next.js front‑end and therefore always
     returns an object with a ``summary`` field.  When a ``fileContent``
-    property is provided the PDF is parsed using ``PyPDF2`` to extract
+    property is provided the PDF is parsed using ``pypdfium2`` to extract
     plain text prior to summarisation.  If a ``text`` field is supplied
     directly it is used verbatim.
 
     If the OpenAI client is configured via the ``OPENAI_API_KEY``
     environment variable then the summary is generated with GPT‑3.5,
-    otherwise a fallback summariser simply truncates the input.
+    otherwise a fallback summariser simply truncates the input.  Rate
+    limits, timeouts and server errors that persist through the retries
+    are answered with 503 (504 for timeouts or once the deadline is
+    reached) and a ``Retry-After`` header, and a spent request budget with
+    429; only other API errors fall back to truncation.
     """
+    deadline = _deadline(context)
+
+    # Warm-up pings (sent by UploadHandler ahead of the usual follow-up
+    # request, or by a scheduled warmer) only need the container started
+    if event.get("warmup") or event.get("source") == "serverless-plugin-warmup":
+        return {"statusCode": 204}
+
+    if len(event.get("body") or "") > _MAX_BODY_BYTES:
+        return {"statusCode": 413, "body": _dumps({"error": "Request body too large"})}
+
     # Decode the body.  API Gateway may send Base64‑encoded payloads
-    body = event.get("body") or "{}"
-    if event.get("isBase64Encoded"):
-        import base64
-        body = base64.b64decode(body).decode()
     try:
-        payload = json.loads(body)
-    except json.JSONDecodeError as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid JSON: {exc}"})}
+        request = _parse_body(event)
+    except msgspec.DecodeError as exc:
+        return {"statusCode": 400, "body": _dumps({"error": f"Invalid JSON: {exc}"})}
 
-    # Determine which field to use for source text
+    # Determine which field to use for source text.  The cache key is the
+    # hash of what was sent, so that a cached PDF needn't be extracted again.
     text: str | None = None
+    pdf_bytes: bytes | None = None
     # Direct text provided
-    if isinstance(payload.get("text"), str) and payload["text"]:
-        text = payload["text"]
+    if request.text:
+        text = request.text
+        cache_key = "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+    # Key of an uploaded PDF whose text has been extracted to S3
+    elif request.s3Key:
+        extracted_bucket = os.environ.get("EXTRACTED_BUCKET_NAME")
+        if not extracted_bucket:
+            return {"statusCode": 500, "body": _dumps({"error": "EXTRACTED_BUCKET_NAME not configured"})}
+        text_key = f"extracted/{os.path.splitext(request.s3Key)[0]}.txt"
+        try:
+            text = _S3.get_object(Bucket=extracted_bucket, Key=text_key)["Body"].read().decode("utf-8")
+        except _S3.exceptions.NoSuchKey:
+            return _missing_text_response(request.s3Key)
+        cache_key = "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
     # Base64 encoded PDF provided
-    elif isinstance(payload.get("fileContent"), str) and payload["fileContent"]:
-        b64_str = payload["fileContent"]
+    elif request.fileContent:
+        if pdfium is None:
+            return {"statusCode": 500, "body": _dumps({"error": "PDF support is not installed"})}
+        # PDFium reads the decoded bytes in place (no BytesIO copy), and the
+        # parsed base64 string is released once it has been decoded.  The
+        # raw ``event["body"]`` still holds the whole base64 JSON until the
+        # handler returns, so extraction runs next to that copy as well.
+        b64_str, request.fileContent = request.fileContent, None
         try:
-            import base64
-            import io
-            from PyPDF2 import PdfReader  # type: ignore
+            pdf_bytes = _b64decode(b64_str)
+        except ValueError as exc:
+            return {"statusCode": 400, "body": _dumps({"error": f"Failed to decode PDF: {exc}"})}
+        del b64_str
+        cache_key = "pdf:" + hashlib.sha256(pdf_bytes).hexdigest()
+    else:
+        return {"statusCode": 400, "body": _dumps({"error": "Missing 'text', 's3Key' or 'fileContent' in request"})}
+
+    # Only LLM summaries are cached; the fallback is cheaper than a lookup
+    cache_table = os.environ.get("SUMMARY_CACHE_TABLE") if _OPENAI else None
+    if cache_table:
+        cached = _cached_summary(cache_table, cache_key)
+        if cached is not None:
+            return {"statusCode": 200, "body": _dumps(_summary_body(*cached))}
 
-            pdf_bytes = base64.b64decode(b64_str)
-            reader = PdfReader(io.BytesIO(pdf_bytes))
-            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    if pdf_bytes is not None:
+        try:
+            text = _pdf_text(pdf_bytes)
         except Exception as exc:
-            return {"statusCode": 400, "body": json.dumps({"error": f"Failed to decode PDF: {exc}"})}
-    else:
-        return {"statusCode": 400, "body": json.dumps({"error": "Missing 'text' or 'fileContent' in request"})}
+            return {"statusCode": 400, "body": _dumps({"error": f"Failed to decode PDF: {exc}"})}
 
     # Validate text
     if not text:
-        return {"statusCode": 400, "body": json.dumps({"error": "No content provided to summarise"})}
+        return {"statusCode": 400, "body": _dumps({"error": "No content provided to summarise"})}
 
     # Generate summary using LLM or fallback
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if openai and api_key:
-        openai.api_key = api_key
+    if _OPENAI:
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarises study material."},
-                    {"role": "user", "content": text},
-                ],
-                temperature=0.5,
-                max_tokens=300,
-            )
-            summary = response["choices"][0]["message"]["content"].strip()
+            summary, truncated = _summarize_long(text, deadline)
+        except _BudgetExhausted:
+            # The bucket is refilled about once a minute
+            return {
+                "statusCode": 429,
+                "headers": {"Retry-After": str(60 - int(time.time()) % 60)},
+                "body": _dumps({"error": "Too many requests, try again later"}),
+            }
+        except (_DeadlineExceeded, *_RETRYABLE_ERRORS) as exc:
+            # Transient failures that outlast the retries are reported, so
+            # the client can retry for a real summary instead of mistaking
+            # a truncation for one
+            timed_out = isinstance(exc, _DeadlineExceeded) or isinstance(exc, openai.APITimeoutError)
+            return {
+                "statusCode": 504 if timed_out else 503,
+                "headers": {"Retry-After": str(_CLIENT_RETRY_AFTER_SECONDS)},
+                "body": _dumps({"error": "Summary service temporarily unavailable"}),
+            }
         except Exception:
-            summary = _fallback_summary(text)
+            summary, truncated = _fallback_summary(text), False
+        else:
+            if cache_table:
+                _store_summary(cache_table, cache_key, summary, truncated)
     else:
-        summary = _fallback_summary(text)
+        summary, truncated = _fallback_summary(text), False
 
     return {
         "statusCode": 200,
-        "body": json.dumps({"summary": summary}),
+        "body": _dumps(_summary_body(summary, truncated)),
     }
\ No newline at end of file
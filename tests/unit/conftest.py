@@ -0,0 +1,5 @@
+import os
+
+# The handlers create their boto3 clients at import time, which needs a
+# region; the tests replace the clients with stubs before calling them.
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
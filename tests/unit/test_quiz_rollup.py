@@ -0,0 +1,183 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from get_performance import app as performance_app
+from submit_quiz import app as submit_app
+
+STATS = "__stats__"
+
+
+class ConditionalCheckFailed(Exception):
+    pass
+
+
+class TransactionCanceled(Exception):
+    pass
+
+
+class FakeResultsTable:
+    """Stub DynamoDB client holding the quiz results of every user."""
+
+    exceptions = SimpleNamespace(
+        ConditionalCheckFailedException=ConditionalCheckFailed,
+        TransactionCanceledException=TransactionCanceled,
+    )
+
+    def __init__(self, before_transaction=None):
+        self.items = {}
+        self.before_transaction = before_transaction
+
+    def _item(self, key):
+        return self.items.get((key["userId"]["S"], key["quizId"]["S"]))
+
+    @staticmethod
+    def _allowed(current, condition, values):
+        if condition == "attribute_not_exists(quizId)":
+            return current is None
+        if condition == "#score = :old":
+            return current is not None and current["score"] == values[":old"]
+        if condition == "attribute_not_exists(version)":
+            return current is None or "version" not in current
+        if condition == "version = :version":
+            return current is not None and current.get("version") == values[":version"]
+        raise AssertionError(condition)
+
+    @staticmethod
+    def _add(item, values):
+        for name, placeholder in (("totalScore", ":score"), ("totalQuizzes", ":quizzes"), ("version", ":one")):
+            total = int(item.get(name, {"N": "0"})["N"]) + int(values[placeholder]["N"])
+            item[name] = {"N": str(total)}
+
+    def batch_get_item(self, RequestItems):
+        ((table_name, request),) = RequestItems.items()
+        assert request["ConsistentRead"]
+        found = [item for item in map(self._item, request["Keys"]) if item is not None]
+        return {"Responses": {table_name: found}}
+
+    def transact_write_items(self, TransactItems):
+        if self.before_transaction:
+            before, self.before_transaction = self.before_transaction, None
+            before(self)
+        for action in TransactItems:
+            if "Put" in action:
+                put = action["Put"]
+                current = self._item(put["Item"])
+                if not self._allowed(current, put["ConditionExpression"], put.get("ExpressionAttributeValues")):
+                    raise TransactionCanceled()
+        for action in TransactItems:
+            if "Put" in action:
+                item = action["Put"]["Item"]
+                self.items[(item["userId"]["S"], item["quizId"]["S"])] = dict(item)
+            else:
+                update = action["Update"]
+                key = (update["Key"]["userId"]["S"], update["Key"]["quizId"]["S"])
+                self._add(self.items.setdefault(key, dict(update["Key"])), update["ExpressionAttributeValues"])
+        return {}
+
+    def get_item(self, TableName, Key, ConsistentRead):
+        item = self._item(Key)
+        return {"Item": dict(item)} if item else {}
+
+    def get_paginator(self, operation):
+        def paginate(ExpressionAttributeValues, ConsistentRead, **kwargs):
+            user_id = ExpressionAttributeValues[":user"]["S"]
+            return [{"Items": [item for (user, _), item in self.items.items() if user == user_id]}]
+
+        return SimpleNamespace(paginate=paginate)
+
+    def update_item(self, TableName, Key, UpdateExpression, ConditionExpression, ExpressionAttributeValues):
+        current = self._item(Key)
+        if not self._allowed(current, ConditionExpression, ExpressionAttributeValues):
+            raise ConditionalCheckFailed()
+        item = self.items.setdefault((Key["userId"]["S"], Key["quizId"]["S"]), dict(Key))
+        item["totalQuizzes"] = ExpressionAttributeValues[":quizzes"]
+        item["totalScore"] = ExpressionAttributeValues[":score"]
+        item["seeded"] = ExpressionAttributeValues[":seeded"]
+        return {}
+
+    def rollup(self, user_id="user-1"):
+        item = self.items[(user_id, STATS)]
+        return int(item["totalQuizzes"]["N"]), int(item["totalScore"]["N"])
+
+
+@pytest.fixture()
+def table(monkeypatch):
+    fake = FakeResultsTable()
+    monkeypatch.setattr(submit_app, "_DDB", fake)
+    monkeypatch.setattr(performance_app, "_DDB", fake)
+    monkeypatch.setattr(submit_app.time, "sleep", lambda seconds: None)
+    monkeypatch.setenv("QUIZ_RESULTS_TABLE", "results")
+    return fake
+
+
+def _submit(quiz_id, correct, total=4, user_id="user-1"):
+    answers = ["A"] * correct + ["B"] * (total - correct)
+    body = {"userId": user_id, "quizId": quiz_id, "answers": answers, "correctAnswers": ["A"] * total}
+    return submit_app.lambda_handler({"body": json.dumps(body)}, None)
+
+
+def _performance(user_id="user-1"):
+    response = performance_app.lambda_handler({"body": json.dumps({"userId": user_id})}, None)
+    return json.loads(response["body"])
+
+
+def test_resubmission_replaces_previous_score_in_rollup(table):
+    _submit("quiz-1", correct=2)
+    _submit("quiz-2", correct=3)
+    _submit("quiz-1", correct=4)
+
+    assert table.rollup() == (2, 7)
+
+
+def test_batch_resubmission_applies_only_deltas(table):
+    _submit("quiz-1", correct=1)
+    body = {
+        "userId": "user-1",
+        "submissions": [
+            {"quizId": "quiz-1", "answers": ["A", "A"], "correctAnswers": ["A", "A"]},
+            {"quizId": "quiz-2", "answers": ["A", "B"], "correctAnswers": ["A", "A"]},
+        ],
+    }
+    response = submit_app.lambda_handler({"body": json.dumps(body)}, None)
+
+    assert json.loads(response["body"]) == {"scores": [2, 1]}
+    assert table.rollup() == (2, 3)
+
+
+def test_concurrent_resubmission_is_not_counted_twice(table):
+    _submit("quiz-1", correct=1)
+    # Another request resubmits the same quiz between our read and write
+    table.before_transaction = lambda fake: _submit("quiz-1", correct=3)
+    _submit("quiz-1", correct=2)
+
+    assert table.rollup() == (1, 2)
+
+
+def test_seeding_keeps_deltas_that_land_during_aggregation(table, monkeypatch):
+    table.items[("user-1", "quiz-1")] = {
+        "userId": {"S": "user-1"}, "quizId": {"S": "quiz-1"}, "score": {"N": "2"},
+    }
+    aggregate = performance_app._aggregate_results
+
+    def racing_aggregate(table_name, user_id):
+        totals = aggregate(table_name, user_id)
+        _submit("quiz-2", correct=3)
+        return totals
+
+    monkeypatch.setattr(performance_app, "_aggregate_results", racing_aggregate)
+    assert _performance()["totalQuizzes"] == 1
+    # The stale seed was rejected; the next request seeds the full totals
+    monkeypatch.setattr(performance_app, "_aggregate_results", aggregate)
+    assert _performance() == {"userId": "user-1", "totalQuizzes": 2, "totalScore": 5, "averageScore": 2.5}
+    assert table.rollup() == (2, 5)
+    assert "seeded" in table.items[("user-1", STATS)]
+
+
+def test_mixed_type_answers_score_the_same_on_every_path():
+    answers = [1, "1"] * 35
+    correct = ["1"] * 70
+
+    assert submit_app._score(answers, correct) == 35
+    assert submit_app._score_all([("quiz-1", answers, correct), ("quiz-2", correct, correct)]) == [35, 70]
@@ -0,0 +1,114 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from save_xp_badge_progress import app
+
+TODAY = 20000
+NOW = TODAY * 86400 + 3600
+
+
+class ConditionalCheckFailed(Exception):
+    pass
+
+
+class FakeProgressTable:
+    """Stub DynamoDB client holding a single user's progress item."""
+
+    exceptions = SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailed)
+
+    def __init__(self, item=None, before_streak_update=None):
+        self.item = dict(item or {})
+        self.before_streak_update = before_streak_update
+        self.calls = 0
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues,
+                    ConditionExpression=None):
+        self.calls += 1
+        values = {name: int(value["N"]) for name, value in ExpressionAttributeValues.items()}
+        if UpdateExpression.startswith("SET xp"):
+            self.item["xp"] = self.item.get("xp", 0) + values[":xp"]
+            self.item["lastActivity"] = values[":now"]
+        else:
+            if self.before_streak_update:
+                self.before_streak_update(self.item)
+            if ConditionExpression == "attribute_not_exists(lastActiveDay)":
+                allowed = "lastActiveDay" not in self.item
+            else:
+                allowed = self.item.get("lastActiveDay") == values[":seen"]
+            if not allowed:
+                raise ConditionalCheckFailed()
+            self.item["streak"] = values[":streak"]
+            self.item["lastActiveDay"] = values[":today"]
+        attributes = {name: {"N": str(value)} for name, value in self.item.items()}
+        return {"Attributes": {"userId": {"S": Key["userId"]["S"]}, **attributes}}
+
+
+@pytest.fixture()
+def table(monkeypatch):
+    def install(**kwargs):
+        fake = FakeProgressTable(**kwargs)
+        monkeypatch.setattr(app, "_DDB", fake)
+        return fake
+
+    monkeypatch.setenv("PROGRESS_TABLE", "progress")
+    monkeypatch.setattr(app.time, "time", lambda: NOW)
+    return install
+
+
+def _save(xp=10):
+    ret = app.lambda_handler({"body": json.dumps({"userId": "user-1", "xp": xp})}, None)
+    assert ret["statusCode"] == 200
+    return json.loads(ret["body"])["progress"]
+
+
+def test_first_activity_starts_streak(table):
+    fake = table()
+
+    progress = _save()
+
+    assert progress["streak"] == 1
+    assert progress["lastActiveDay"] == TODAY
+    assert fake.item["xp"] == 10
+
+
+def test_same_day_keeps_streak_with_single_write(table):
+    fake = table(item={"xp": 5, "streak": 3, "lastActiveDay": TODAY})
+
+    progress = _save()
+
+    assert fake.calls == 1
+    assert progress["streak"] == 3
+    assert progress["xp"] == 15
+
+
+def test_next_day_extends_streak(table):
+    fake = table(item={"xp": 5, "streak": 3, "lastActiveDay": TODAY - 1})
+
+    progress = _save()
+
+    assert progress["streak"] == 4
+    assert fake.item["lastActiveDay"] == TODAY
+
+
+def test_missed_day_resets_streak(table):
+    table(item={"xp": 5, "streak": 3, "lastActiveDay": TODAY - 2})
+
+    progress = _save()
+
+    assert progress["streak"] == 1
+
+
+def test_concurrent_request_advances_streak_only_once(table):
+    def other_request_wins(item):
+        item["streak"] = 4
+        item["lastActiveDay"] = TODAY
+
+    fake = table(item={"xp": 5, "streak": 3, "lastActiveDay": TODAY - 1}, before_streak_update=other_request_wins)
+
+    _save()
+
+    assert fake.calls == 2
+    assert fake.item["streak"] == 4
+    assert fake.item["lastActiveDay"] == TODAY
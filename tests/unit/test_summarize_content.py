@@ -0,0 +1,51 @@
+from botocore.exceptions import EndpointConnectionError
+
+from summarize_content import app
+
+
+def _document(chars):
+    line = "x" * 79 + "\n"
+    return (line * (chars // len(line) + 1))[:chars]
+
+
+def test_short_input_is_one_chunk():
+    text = _document(5_000)
+
+    assert app._chunks(text) == ([text], False)
+
+
+def test_long_input_is_covered_by_larger_chunks():
+    text = _document(303_000)
+    chunks, truncated = app._chunks(text)
+
+    assert not truncated
+    assert len(chunks) <= app._MAX_CHUNKS
+    assert max(map(len, chunks)) <= app._MAX_CHUNK_CHARS
+    assert "".join(chunks) == text
+
+
+def test_input_beyond_the_limit_is_flagged_as_truncated():
+    text = _document(app._MAX_CHUNKS * app._MAX_CHUNK_CHARS + 1_000)
+    chunks, truncated = app._chunks(text)
+
+    assert truncated
+    assert len(chunks) == app._MAX_CHUNKS
+    assert text.startswith("".join(chunks))
+
+
+def test_truncated_summary_is_flagged_in_the_body():
+    assert app._summary_body("summary", True) == {"summary": "summary", "truncated": True}
+    assert app._summary_body("summary", False) == {"summary": "summary"}
+
+
+def test_cache_errors_are_treated_as_misses(monkeypatch):
+    class UnreachableTable:
+        def get_item(self, **kwargs):
+            raise EndpointConnectionError(endpoint_url="https://dynamodb")
+
+        put_item = get_item
+
+    monkeypatch.setattr(app, "_DDB", UnreachableTable())
+
+    assert app._cached_summary("cache", "text:abc") is None
+    app._store_summary("cache", "text:abc", "summary", False)
@@ -0,0 +1,100 @@
+import base64
+import json
+import os
+
+import pytest
+
+from upload_handler import app
+
+
+class FakeS3:
+    """Stub S3 client recording the bytes of every uploaded object."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, file_obj, bucket, key, ExtraArgs=None, Config=None):
+        self.objects[(bucket, key)] = file_obj.read()
+
+
+@pytest.fixture()
+def s3(monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(app, "_S3", fake)
+    monkeypatch.setenv("UPLOADS_BUCKET_NAME", "uploads")
+    monkeypatch.delenv("SUMMARIZE_FUNCTION_NAME", raising=False)
+    return fake
+
+
+def _upload(content_b64):
+    body = json.dumps({"fileName": "notes.pdf", "fileContent": content_b64})
+    return app.lambda_handler({"body": body}, None)
+
+
+def test_unwrapped_payload_spanning_several_slices(s3):
+    data = os.urandom(3 * 1024 * 1024 + 5)
+
+    assert _upload(base64.b64encode(data).decode())["statusCode"] == 200
+    assert s3.objects[("uploads", "notes.pdf")] == data
+
+
+def test_line_wrapped_payload_spanning_several_slices(s3):
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    wrapped = base64.encodebytes(data).decode()
+    assert len(wrapped) > 2 * app._DECODE_CHUNK_CHARS
+
+    assert _upload(wrapped)["statusCode"] == 200
+    assert s3.objects[("uploads", "notes.pdf")] == data
+
+
+def test_crlf_wrapped_payload(s3):
+    data = os.urandom(2 * 1024 * 1024)
+    wrapped = base64.encodebytes(data).decode().replace("\n", "\r\n")
+
+    assert _upload(wrapped)["statusCode"] == 200
+    assert s3.objects[("uploads", "notes.pdf")] == data
+
+
+def test_truncated_payload_is_rejected(s3):
+    content_b64 = base64.b64encode(os.urandom(1024)).decode()[:-1]
+
+    assert _upload(content_b64)["statusCode"] == 400
+    assert not s3.objects
+
+
+def test_raw_text_body_outside_latin1_is_rejected(s3):
+    event = {
+        "body": "%PDF-1.7 ✓",
+        "headers": {"Content-Type": "application/pdf"},
+        "queryStringParameters": {"fileName": "notes.pdf"},
+    }
+
+    assert app.lambda_handler(event, None)["statusCode"] == 400
+    assert not s3.objects
+
+
+def test_invalid_request_does_not_warm_summarize(s3, monkeypatch):
+    warmed = []
+    monkeypatch.setenv("SUMMARIZE_FUNCTION_NAME", "summarize")
+    monkeypatch.setattr(app, "_warm_summarize", lambda: warmed.append(True))
+
+    assert app.lambda_handler({"body": json.dumps({"fileName": "notes.pdf"})}, None)["statusCode"] == 400
+    assert not warmed
+
+
+def test_invalid_base64_does_not_warm_summarize(s3, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(app, "_warm_summarize", lambda: warmed.append(True))
+    raw_event = {
+        "body": "not base64!",
+        "isBase64Encoded": True,
+        "headers": {"Content-Type": "application/pdf"},
+        "queryStringParameters": {"fileName": "notes.pdf"},
+    }
+
+    assert _upload("not base64!")["statusCode"] == 400
+    assert app.lambda_handler(raw_event, None)["statusCode"] == 400
+    assert not warmed
+
+    assert _upload(base64.b64encode(b"%PDF-1.7").decode())["statusCode"] == 200
+    assert warmed
@@ -9,52 +9,198 @@ expects the incoming event to contain a JSON body with two fields:
 
 When invoked, the function decodes the file content, writes it to the
 configured S3 bucket, and returns a signed URL (or plain S3 URL) pointing to
-the stored object.  The destination bucket name must be provided via the
-``UPLOADS_BUCKET_NAME`` environment variable.
+the stored object together with its ``s3Key``, which can be passed to
+``/summarize`` once ExtractText has processed the file.  The destination
+bucket name must be provided via the ``UPLOADS_BUCKET_NAME`` environment
+variable.
+
+Uploads are almost always followed by a ``/summarize`` request, so when
+``SUMMARIZE_FUNCTION_NAME`` is set the function fires an asynchronous
+warm-up invocation of it once the request has been validated; the
+summarize container then starts while the upload is still in progress.
 
 This simplified implementation avoids multipart parsing.  Front‑end code
-should Base64‑encode the file and send it as JSON to this endpoint.
+should Base64‑encode the file and send it as JSON to this endpoint, or
+POST the raw PDF with ``Content-Type: application/pdf`` and the file name
+in a ``fileName`` query string parameter (or ``X-File-Name`` header).  The
+raw form skips the base64 inflation of the request and the JSON parse;
+``application/pdf`` is registered as an API Gateway binary media type.
 """
 
 import base64
-import json
+import binascii
+import io
 import os
+import tempfile
 from typing import Any, Dict
 
 import boto3
+import msgspec
+import orjson
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+try:
+    # SIMD-accelerated decoder for large PDF payloads
+    from pybase64 import b64decode as _b64decode  # type: ignore
+except ImportError:
+    from base64 import b64decode as _b64decode
+
+# Created once per container and reused across warm invocations.  Keep-alive
+# keeps the pooled TLS connections to S3 open between requests.
+_S3 = boto3.client(
+    "s3",
+    config=Config(
+        signature_version="s3v4",
+        tcp_keepalive=True,
+        max_pool_connections=10,
+        retries={"max_attempts": 3, "mode": "standard"},
+    ),
+)
+
+# Warm-up invocations are fire-and-forget; a slow or failing Lambda API is
+# given up on quickly instead of delaying the upload
+_LAMBDA = boto3.client(
+    "lambda",
+    config=Config(connect_timeout=1, read_timeout=1, retries={"total_max_attempts": 1}),
+)
+
+_WARMUP_PAYLOAD = orjson.dumps({"warmup": True})
+
+# ``fileContent`` is decoded in slices of about 1 MiB of output
+_DECODE_CHUNK_CHARS = 4 * (1024 * 1024 // 3)
+# Decoded uploads stay in memory up to this size before spilling to /tmp
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Lambda's synchronous invocation payload limit; larger request bodies are
+# rejected before anything is decoded
+_MAX_BODY_BYTES = 6 * 1024 * 1024
+
+
+class _UploadRequest(msgspec.Struct):
+    """JSON body of a base64 upload."""
+
+    fileName: str
+    fileContent: str
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def _parse_body(event: Dict[str, Any]) -> _UploadRequest:
+    """Decode and validate the JSON body of an API Gateway proxy event.
+
+    ``msgspec`` checks the fields against ``_UploadRequest`` while parsing,
+    in a single pass; a base64-encoded body is decoded straight into the
+    parser without an intermediate ``str``.
+    """
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return msgspec.json.decode(body, type=_UploadRequest)
+
+
+def _warm_summarize() -> None:
+    """Start a summarize container ahead of the request that usually follows."""
+    function_name = os.environ.get("SUMMARIZE_FUNCTION_NAME")
+    if not function_name:
+        return
+    try:
+        _LAMBDA.invoke(FunctionName=function_name, InvocationType="Event", Payload=_WARMUP_PAYLOAD)
+    except (ClientError, BotoCoreError):
+        # Warming is best effort and must never fail the upload
+        pass
+
+
+def _header(event: Dict[str, Any], name: str) -> str | None:
+    """Return the value of request header ``name`` (case-insensitive)."""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _upload_base64(bucket_name: str, key: str, content_b64: str) -> None:
+    """Decode ``content_b64`` and upload it to S3.
+
+    The content is decoded slice by slice into a spooled file rather than
+    holding the whole decoded PDF next to its base64 form, then streamed to
+    S3.  Line breaks and other
+    whitespace (as in MIME-style wrapped base64) are dropped from each slice,
+    and the characters past the last full four-character group are carried
+    over to the next one.  Summarize is warmed once the whole content has
+    been decoded.  Raises ``binascii.Error`` if the content is not valid
+    base64.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES) as file_obj:
+        carry = ""
+        for start in range(0, len(content_b64), _DECODE_CHUNK_CHARS):
+            chunk = carry + "".join(content_b64[start:start + _DECODE_CHUNK_CHARS].split())
+            end = len(chunk) - len(chunk) % 4
+            file_obj.write(_b64decode(chunk[:end]))
+            carry = chunk[end:]
+        if carry:
+            # Not a whole number of groups; fails with "Incorrect padding"
+            _b64decode(carry)
+        # The content is known to be valid only now
+        _warm_summarize()
+        file_obj.seek(0)
+        _S3.upload_fileobj(file_obj, bucket_name, key, ExtraArgs={"ContentType": "application/pdf"})
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Retrieve bucket name from environment
     bucket_name = os.environ.get("UPLOADS_BUCKET_NAME")
     if not bucket_name:
-        return {"statusCode": 500, "body": json.dumps({"error": "UPLOADS_BUCKET_NAME not configured"})}
+        return {"statusCode": 500, "body": _dumps({"error": "UPLOADS_BUCKET_NAME not configured"})}
 
-    # Parse JSON body
-    try:
-        body = event.get("body")
-        if event.get("isBase64Encoded"):
-            body = base64.b64decode(body).decode()
-        payload = json.loads(body or "{}")
-        file_name = payload["fileName"]
-        file_content_b64 = payload["fileContent"]
-    except (KeyError, json.JSONDecodeError) as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Invalid input: {exc}"})}
-
-    # Decode the file content
-    try:
-        file_bytes = base64.b64decode(file_content_b64)
-    except Exception as exc:
-        return {"statusCode": 400, "body": json.dumps({"error": f"Unable to decode fileContent: {exc}"})}
+    if len(event.get("body") or "") > _MAX_BODY_BYTES:
+        return {"statusCode": 413, "body": _dumps({"error": "Request body too large"})}
+
+    content_type = (_header(event, "content-type") or "").split(";")[0].strip().lower()
+    if content_type == "application/pdf":
+        # Raw PDF body; API Gateway hands binary media types to the function
+        # base64-encoded
+        file_name = (event.get("queryStringParameters") or {}).get("fileName") or _header(event, "x-file-name")
+        if not file_name:
+            return {"statusCode": 400, "body": _dumps({"error": "Missing 'fileName' query parameter"})}
+        body = event.get("body") or ""
+        key = file_name
+        if not event.get("isBase64Encoded"):
+            # A body that arrives as text maps back to bytes one-to-one only
+            # if it was never decoded past latin-1
+            try:
+                content = body.encode("latin-1")
+            except UnicodeEncodeError as exc:
+                return {"statusCode": 400, "body": _dumps({"error": f"Unable to decode body: {exc}"})}
+            _warm_summarize()
+            _S3.upload_fileobj(
+                io.BytesIO(content),
+                bucket_name,
+                key,
+                ExtraArgs={"ContentType": "application/pdf"},
+            )
+        else:
+            try:
+                _upload_base64(bucket_name, key, body)
+            except (binascii.Error, ValueError) as exc:
+                return {"statusCode": 400, "body": _dumps({"error": f"Unable to decode body: {exc}"})}
+    else:
+        # Parse JSON body
+        try:
+            request = _parse_body(event)
+        except msgspec.DecodeError as exc:
+            return {"statusCode": 400, "body": _dumps({"error": f"Invalid input: {exc}"})}
 
-    # Upload to S3
-    s3_client = boto3.client("s3")
-    key = file_name
-    s3_client.put_object(Bucket=bucket_name, Key=key, Body=file_bytes, ContentType="application/pdf")
+        key = request.fileName
+        try:
+            _upload_base64(bucket_name, key, request.fileContent)
+        except (binascii.Error, ValueError) as exc:
+            return {"statusCode": 400, "body": _dumps({"error": f"Unable to decode fileContent: {exc}"})}
 
     # Construct the S3 URL (non‑signed) – adjust if you need signed URLs
     url = f"https://{bucket_name}.s3.amazonaws.com/{key}"
     return {
         "statusCode": 200,
-        "body": json.dumps({"fileUrl": url}),
+        "body": _dumps({"fileUrl": url, "s3Key": key}),
     }
\ No newline at end of file